@@ -5,6 +5,7 @@ from flask import Flask
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 from flask_cors import CORS
 from blockchain_node import create_blockchain_app
+from log_config import configure_logging
 from user_management import create_user_app
 from dotenv import load_dotenv
 import signal
@@ -13,8 +14,8 @@ import multiprocessing
 # Wczytaj zmienne środowiskowe
 load_dotenv()
 
-# Konfiguracja loggera
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# Konfiguracja loggera - asynchroniczny zapis, poziomy per komponent (LOG_LEVEL, LOG_LEVELS)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 def create_app():
@@ -48,20 +49,20 @@ def create_app():
         logger.info("Główna aplikacja została utworzona pomyślnie.")
         return app
     except Exception as e:
-        logger.error(f"Błąd podczas tworzenia aplikacji: {e}")
+        logger.error("Błąd podczas tworzenia aplikacji: %s", e)
         sys.exit(1)
 
 def start_node(port):
     """Uruchamia pojedynczy węzeł blockchain."""
     app = create_app()
-    logger.info(f"Uruchamianie węzła na porcie {port}...")
+    logger.info("Uruchamianie węzła na porcie %s...", port)
     app.run(host='0.0.0.0', port=port)
 
 def start_network(num_nodes=6, start_port=5001):
-    logger.info(f"Uruchamianie sieci z {num_nodes} węzłami...")
+    logger.info("Uruchamianie sieci z %s węzłami...", num_nodes)
     processes = []
     node_addresses = generate_node_addresses(start_port, num_nodes)
-    logger.info(f"Adresy węzłów: {node_addresses}")
+    logger.info("Adresy węzłów: %s", node_addresses)
     
     for i in range(num_nodes):
         port = start_port + i
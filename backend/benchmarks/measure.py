@@ -0,0 +1,135 @@
+import json
+import math
+import time
+import statistics
+import tracemalloc
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = min(max(math.ceil(fraction * len(ordered)), 1), len(ordered))
+    return ordered[rank - 1]
+
+
+def median_absolute_deviation(values):
+    """Spread of the values around their median, robust to single outliers"""
+    median = statistics.median(values)
+    return statistics.median(abs(value - median) for value in values)
+
+
+class BenchmarkResult:
+    def __init__(self, name, unit, items_per_operation, durations, peak_bytes, extra=None):
+        self.name = name
+        self.unit = unit
+        self.items_per_operation = items_per_operation
+        self.durations = durations
+        self.peak_bytes = peak_bytes
+        self.extra = extra or {}
+
+    @property
+    def throughput(self):
+        """Items (blocks, transactions, images) processed per second"""
+        total = sum(self.durations)
+        return self.items_per_operation * len(self.durations) / total if total > 0 else 0.0
+
+    @property
+    def median_throughput(self):
+        """Items per second of the median call - what baselines are compared on"""
+        median = statistics.median(self.durations)
+        return self.items_per_operation / median if median > 0 else 0.0
+
+    def latency_ms(self, fraction):
+        return percentile(self.durations, fraction) * 1000
+
+    def to_dict(self):
+        return {
+            'unit': self.unit,
+            'operations': len(self.durations),
+            'items_per_operation': self.items_per_operation,
+            'throughput': self.throughput,
+            'median_throughput': self.median_throughput,
+            'median_ms': statistics.median(self.durations) * 1000,
+            'mad_ms': median_absolute_deviation(self.durations) * 1000,
+            'p50_ms': self.latency_ms(0.50),
+            'p95_ms': self.latency_ms(0.95),
+            'p99_ms': self.latency_ms(0.99),
+            'peak_memory_bytes': self.peak_bytes,
+            **self.extra
+        }
+
+
+def measure(name, operation, iterations, unit, items_per_operation=1, setup=None, warmup=1):
+    """
+    Time `iterations` calls of operation(state), where state comes from setup(i) and is
+    prepared outside the timed section. Peak memory is taken from one extra call traced
+    by tracemalloc, so tracing does not slow down the timed calls.
+    """
+    setup = setup or (lambda iteration: None)
+    for iteration in range(warmup):
+        operation(setup(-1 - iteration))
+
+    durations = []
+    for iteration in range(iterations):
+        state = setup(iteration)
+        started = time.perf_counter()
+        operation(state)
+        durations.append(time.perf_counter() - started)
+
+    state = setup(iterations)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        operation(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(name, unit, items_per_operation, durations, peak)
+
+
+def load_baseline(path):
+    try:
+        with open(path) as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, config, machine, results):
+    with open(path, 'w') as baseline_file:
+        json.dump({
+            'config': config,
+            'machine': machine,
+            'results': {result.name: result.to_dict() for result in results}
+        }, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def relative_noise(entry):
+    """MAD of the call durations as a fraction of their median (0 for baselines recorded without it)"""
+    median, mad = entry.get('median_ms'), entry.get('mad_ms')
+    return mad / median if median and mad is not None else 0.0
+
+
+def compare(results, baseline, tolerance, noise_factor=3):
+    """
+    Median-based ratios against the baseline per benchmark. A benchmark is flagged as slower
+    when its median call time grew by more than the threshold - `tolerance` (a fraction),
+    widened to `noise_factor` times the relative MAD of either run when that is larger, so
+    jitter of a noisy benchmark is not reported as a regression.
+    """
+    comparison = {}
+    for result in results:
+        previous = baseline['results'].get(result.name)
+        if previous is None or not previous.get('median_ms'):
+            continue
+        current = result.to_dict()
+        median = current['median_ms'] / previous['median_ms']
+        threshold = max(tolerance, noise_factor * max(relative_noise(current), relative_noise(previous)))
+        comparison[result.name] = {
+            'median': median,
+            'p95': current['p95_ms'] / previous['p95_ms'] if previous['p95_ms'] else None,
+            'threshold': threshold,
+            'regressed': median > 1 + threshold
+        }
+    return comparison
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import logging
+
+import requests
+
+import blockchain_node
+from peer_client import PeerClient
+
+STARTUP_TIMEOUT = 30
+
+
+class LocalResponse:
+    """The part of requests.Response the node uses, built from a Flask test response"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.get_data()
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_lines(self):
+        return iter(self.content.splitlines())
+
+
+class LocalSession:
+    """Stand-in for the requests.Session of one peer - calls its app in-process"""
+
+    def __init__(self, network, peer):
+        self.network = network
+        self.peer = peer
+
+    def request(self, method, url, params=None, json=None, data=None, headers=None, timeout=None, stream=False):
+        client = self.network.clients.get(self.peer)
+        if client is None:
+            raise requests.exceptions.ConnectionError(f"No local node at {self.peer}")
+        path = url[len(self.peer):]
+        if path.startswith('/blockchain'):
+            path = path[len('/blockchain'):]
+        response = client.open(
+            path, method=method, query_string=params, json=json, data=data, headers=headers
+        )
+        return LocalResponse(response)
+
+
+class LocalPeerClient(PeerClient):
+    """PeerClient whose sessions dispatch to the apps of a LocalNetwork instead of HTTP"""
+    network = None
+
+    def session(self, peer):
+        return LocalSession(self.network, peer)
+
+
+class LocalNetwork:
+    """
+    Cluster of blockchain apps in one process, addressed by the same URLs as the docker
+    nodes (http://nodeN:500N). Peer requests keep going through PeerClient, so timeouts,
+    circuit breakers and metrics behave as on a real network - only the transport differs.
+    """
+
+    def __init__(self, num_nodes):
+        self.num_nodes = num_nodes
+        self.clients = {}
+        self.nodes = {}
+
+    @staticmethod
+    def address(index):
+        return f"http://node{index}:500{index}"
+
+    def start(self):
+        LocalPeerClient.network = self
+        blockchain_node.PeerClient = LocalPeerClient
+        os.environ['NUM_NODES'] = str(self.num_nodes)
+        # Węzły startują po kolei - wcześniejsze widzą późniejsze jako niedostępne, to nie błąd
+        logging.disable(logging.ERROR)
+        try:
+            for index in range(1, self.num_nodes + 1):
+                os.environ['NODE_ID'] = f'node{index}'
+                app = blockchain_node.create_blockchain_app()
+                self.clients[self.address(index)] = app.test_client()
+                self.nodes[index] = app.extensions['blockchain']
+            # Pierwszy przebieg skanera integralności rusza od razu - czekamy, żeby nie mierzyć go razem z benchmarkami
+            deadline = time.time() + STARTUP_TIMEOUT
+            while time.time() < deadline and any(node.integrity.cycles == 0 for node in self.nodes.values()):
+                time.sleep(0.05)
+        finally:
+            logging.disable(logging.NOTSET)
+
+        for node in self.nodes.values():
+            for peer in node.nodes:
+                node.peer_states.record_success(peer)
+        return self
+
+    def node(self, index=1):
+        return self.nodes[index]
+
+    def client(self, index=1):
+        return self.clients[self.address(index)]
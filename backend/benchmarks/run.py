@@ -0,0 +1,253 @@
+"""
+Benchmarks for mining, chain validation, chain reconstruction, transaction
+serialization and the /image/process pipeline. Run from the backend directory:
+
+    python -m benchmarks.run [--chain-length 200] [--image-bytes 65536] ...
+    python -m benchmarks.run --save-baseline      # record benchmarks/baseline.json
+
+Peers are in-process apps (benchmarks.network), so no network or docker is needed.
+
+The baseline is machine-local: timings depend on the CPU, its load and the Python build,
+so a baseline is only compared with runs on the machine and with the parameters it was
+recorded with, and it is not kept in the repository. Record your own with --save-baseline
+before changing the code. Medians of the call times are compared and slower benchmarks
+are only reported - the exit code does not depend on them, so the run is not a CI gate.
+"""
+import io
+import os
+import sys
+import shutil
+import random
+import argparse
+import platform
+import tempfile
+
+from blockchain_node import Transaction
+from log_config import configure_logging
+from mining import MINING_ENGINES, SingleProcessMiningEngine
+from benchmarks.network import LocalNetwork
+from benchmarks.workloads import build_chain, make_block, make_image
+from benchmarks.measure import measure, load_baseline, save_baseline, compare
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+# Tylko tło węzłów wyciszone: bez okresowych skanów i bez automatycznego kopania
+BENCHMARK_ENVIRONMENT = {
+    'BLOCKCHAIN_FSYNC': 'false',
+    'INTEGRITY_INTERVAL': '86400',
+    'INTEGRITY_MIN_INTERVAL': '86400',
+    'INTEGRITY_MAX_INTERVAL': '86400',
+    'BLOCK_MAX_TRANSACTIONS': '1000000',
+    'BLOCK_MAX_BYTES': str(1 << 40),
+    'BLOCK_MAX_WAIT': '86400',
+    'LOG_LEVEL': 'WARNING',
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Blockchain node benchmarks')
+    parser.add_argument('--chain-length', type=int, default=200, help='blocks in the synthetic chain')
+    parser.add_argument('--transactions-per-block', type=int, default=4)
+    parser.add_argument('--payload-bytes', type=int, default=1024, help='data size of synthetic transactions')
+    parser.add_argument('--image-bytes', type=int, default=64 * 1024, help='size of images sent to /image/process')
+    parser.add_argument('--difficulty', type=int, default=2, help='difficulty of the synthetic chain')
+    parser.add_argument('--mining-difficulty', type=int, default=4, help='difficulty of the mine_block benchmark')
+    # Jeden proces daje zawsze tę samą liczbę prób - wyniki porównywalne między przebiegami
+    parser.add_argument('--mining-engine', choices=sorted(MINING_ENGINES), default=SingleProcessMiningEngine.name)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--nodes', type=int, default=6, help='nodes in the in-process cluster')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--only', default='', help='comma separated benchmark names')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed growth of the median call time against the baseline (fraction), '
+                             'widened for benchmarks noisier than that')
+    return parser.parse_args(argv)
+
+
+def benchmark_config(args):
+    """Parameters that must match for results to be comparable with a baseline"""
+    return {
+        'chain_length': args.chain_length,
+        'transactions_per_block': args.transactions_per_block,
+        'payload_bytes': args.payload_bytes,
+        'image_bytes': args.image_bytes,
+        'difficulty': args.difficulty,
+        'mining_difficulty': args.mining_difficulty,
+        'mining_engine': args.mining_engine,
+        'iterations': args.iterations,
+        'nodes': args.nodes,
+        'seed': args.seed,
+    }
+
+
+def machine_info():
+    """Where a baseline was recorded - timings from another machine are not comparable"""
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+def bench_mine_block(context, args):
+    engine = context['node'].mining_engine
+    genesis = context['chain'][0]
+    rng = random.Random(args.seed)
+    attempts = {}
+
+    def setup(iteration):
+        block = make_block(rng, iteration + 1, genesis.hash, args.transactions_per_block, args.payload_bytes)
+        return iteration, block
+
+    def operation(state):
+        iteration, block = state
+        attempts[iteration] = block.mine_block(args.mining_difficulty, engine).attempts
+
+    result = measure('mine_block', operation, args.iterations, 'blocks', setup=setup)
+    hashes = sum(attempts[iteration] for iteration in range(args.iterations))
+    result.extra['hash_rate'] = hashes / sum(result.durations)
+    return result
+
+
+def bench_is_chain_valid(context, args):
+    node, chain = context['node'], context['chain']
+
+    def operation(state):
+        if not node.is_chain_valid(chain, full=True):
+            raise RuntimeError('Synthetic chain failed validation')
+
+    return measure('is_chain_valid', operation, args.iterations, 'blocks', items_per_operation=len(chain) - 1)
+
+
+def bench_reconstruct_chain(context, args):
+    node, chain = context['node'], context['chain']
+    chain_data = [block.to_dict() for block in chain]
+    return measure(
+        'reconstruct_chain', lambda state: node.reconstruct_chain(chain_data), args.iterations, 'blocks',
+        items_per_operation=len(chain_data)
+    )
+
+
+def bench_transaction_to_dict(context, args):
+    transactions = [transaction for block in context['chain'][1:] for transaction in block.transactions]
+    return measure(
+        'transaction_to_dict', lambda state: [transaction.to_dict() for transaction in transactions],
+        args.iterations, 'transactions', items_per_operation=len(transactions)
+    )
+
+
+def bench_transaction_from_dict(context, args):
+    entries = [transaction.to_dict() for block in context['chain'][1:] for transaction in block.transactions]
+    return measure(
+        'transaction_from_dict', lambda state: [Transaction.from_dict(entry) for entry in entries],
+        args.iterations, 'transactions', items_per_operation=len(entries)
+    )
+
+
+def bench_image_process(context, args):
+    client = context['network'].client()
+    rng = random.Random(args.seed)
+
+    def setup(iteration):
+        return make_image(rng, args.image_bytes)
+
+    def operation(image):
+        response = client.post(
+            '/image/process',
+            data={'image': (io.BytesIO(image), 'benchmark.png')},
+            content_type='multipart/form-data'
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f'/image/process failed: {response.status_code} {response.get_data(as_text=True)}')
+
+    return measure('image_process', operation, args.iterations, 'images', setup=setup)
+
+
+BENCHMARKS = {
+    'mine_block': bench_mine_block,
+    'is_chain_valid': bench_is_chain_valid,
+    'reconstruct_chain': bench_reconstruct_chain,
+    'transaction_to_dict': bench_transaction_to_dict,
+    'transaction_from_dict': bench_transaction_from_dict,
+    'image_process': bench_image_process,
+}
+
+
+def format_report(results, comparison):
+    header = f"{'benchmark':<22} {'median throughput':>26} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak KB':>10}  baseline"
+    lines = [header, '-' * len(header)]
+    for result in results:
+        entry = result.to_dict()
+        versus = comparison.get(result.name)
+        if versus is None:
+            note = '-'
+        else:
+            note = f"x{versus['median']:.2f} median, x{versus['p95']:.2f} p95"
+            if versus['regressed']:
+                note += f"  SLOWER (>{versus['threshold']:.0%})"
+        throughput = f"{entry['median_throughput']:,.1f} {result.unit}/s"
+        lines.append(
+            f"{result.name:<22} {throughput:>26} {entry['p50_ms']:>10.3f} {entry['p95_ms']:>10.3f} "
+            f"{entry['p99_ms']:>10.3f} {entry['peak_memory_bytes'] / 1024:>10.1f}  {note}"
+        )
+        if 'hash_rate' in entry:
+            lines.append(f"{'':<22} {entry['hash_rate']:>22,.0f} H/s")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    selected = [name for name in args.only.split(',') if name] or list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+        return 2
+
+    data_dir = tempfile.mkdtemp(prefix='blockchain-bench-')
+    try:
+        os.environ.update(BENCHMARK_ENVIRONMENT)
+        os.environ['BLOCKCHAIN_DATA_DIR'] = data_dir
+        os.environ['MINING_ENGINE'] = args.mining_engine
+        configure_logging()
+
+        network = LocalNetwork(args.nodes).start()
+        node = network.node()
+        for member in network.nodes.values():
+            member.difficulty = args.difficulty
+        chain = build_chain(
+            args.chain_length, args.transactions_per_block, args.payload_bytes, args.difficulty, args.seed
+        )
+        context = {'network': network, 'node': node, 'chain': chain}
+
+        results = []
+        for name in selected:
+            results.append(BENCHMARKS[name](context, args))
+    finally:
+        # Wątki replikacji blobów mogą jeszcze pisać do katalogu
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    config = benchmark_config(args)
+    machine = machine_info()
+    baseline = load_baseline(args.baseline)
+    comparison = {}
+    if baseline is not None and baseline.get('config') != config:
+        print(f"Baseline {args.baseline} was recorded with other parameters - not comparing")
+    elif baseline is not None and baseline.get('machine') != machine:
+        print(f"Baseline {args.baseline} was recorded on another machine - not comparing")
+    elif baseline is not None:
+        comparison = compare(results, baseline, args.tolerance)
+
+    print(format_report(results, comparison))
+    if args.save_baseline:
+        save_baseline(args.baseline, config, machine, results)
+        print(f"Baseline saved to {args.baseline}")
+    elif any(versus['regressed'] for versus in comparison.values()):
+        print("Slower than the baseline - re-run to rule out noise before drawing conclusions")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import io
+import random
+
+from PIL import Image
+
+from blockchain_node import Block, Transaction
+from mining import SingleProcessMiningEngine
+
+# Stałe znaczniki czasu - ten sam seed daje te same bloki i tę samą liczbę prób kopania
+BASE_TIMESTAMP = 1700000000.0
+
+
+def make_transactions(rng, count, payload_bytes, timestamp):
+    """Inline image transactions with random payloads (base64 in to_dict, like legacy blocks)"""
+    transactions = []
+    for position in range(count):
+        transaction = Transaction(rng.randbytes(payload_bytes), "image")
+        transaction.timestamp = timestamp + position / 1000
+        transactions.append(transaction)
+    return transactions
+
+
+def make_block(rng, index, previous_hash, transactions_per_block, payload_bytes):
+    timestamp = BASE_TIMESTAMP + index
+    transactions = make_transactions(rng, transactions_per_block, payload_bytes, timestamp)
+    return Block(index, previous_hash, transactions, timestamp)
+
+
+def make_genesis():
+    transaction = Transaction("Genesis Block")
+    transaction.timestamp = BASE_TIMESTAMP
+    genesis = Block(0, "0", [transaction], BASE_TIMESTAMP)
+    genesis.freeze()
+    return genesis
+
+
+def build_chain(length, transactions_per_block, payload_bytes, difficulty, seed):
+    """Valid chain of `length` blocks, the same for the same parameters"""
+    rng = random.Random(seed)
+    engine = SingleProcessMiningEngine()
+    chain = [make_genesis()]
+    for index in range(1, length):
+        block = make_block(rng, index, chain[-1].hash, transactions_per_block, payload_bytes)
+        block.mine_block(difficulty, engine)
+        block.freeze()
+        chain.append(block)
+    return chain
+
+
+def make_image(rng, size_bytes):
+    """PNG of random pixels - noise does not compress, so the file is about size_bytes"""
+    side = max(int((size_bytes / 3) ** 0.5), 1)
+    image = Image.frombytes('RGB', (side, side), rng.randbytes(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
@@ -0,0 +1,67 @@
+import os
+import hashlib
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    Content-addressed store for image payloads kept outside the chain.
+    A blob is saved once under its SHA-256 (blobs/ab/abcdef...), so identical
+    images are deduplicated, and its content is verified against the hash on every read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def is_valid_hash(blob_hash):
+        return isinstance(blob_hash, str) and len(blob_hash) == 64 and all(c in '0123456789abcdef' for c in blob_hash)
+
+    def blob_path(self, blob_hash):
+        return os.path.join(self.path, blob_hash[:2], blob_hash)
+
+    def has(self, blob_hash):
+        return self.is_valid_hash(blob_hash) and os.path.exists(self.blob_path(blob_hash))
+
+    def put(self, data, expected_hash=None):
+        """Store data and return its hash; raises ValueError if it does not match expected_hash"""
+        blob_hash = self.content_hash(data)
+        if expected_hash is not None and blob_hash != expected_hash:
+            raise ValueError(f"Blob content does not match hash {expected_hash}")
+        if self.has(blob_hash):
+            return blob_hash
+
+        directory = os.path.dirname(self.blob_path(blob_hash))
+        os.makedirs(directory, exist_ok=True)
+        # Zapis do pliku tymczasowego i atomowa zamiana - nigdy nie widać częściowego bloba
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self.blob_path(blob_hash))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        logger.info("Stored blob %s (%s bytes)", blob_hash, len(data))
+        return blob_hash
+
+    def get(self, blob_hash):
+        """Blob content, or None if it is missing or damaged (damaged blobs are removed)"""
+        if not self.has(blob_hash):
+            return None
+        with open(self.blob_path(blob_hash), 'rb') as file:
+            data = file.read()
+        if self.content_hash(data) != blob_hash:
+            logger.error("Blob %s is corrupted - removing it", blob_hash)
+            os.remove(self.blob_path(blob_hash))
+            return None
+        return data
@@ -0,0 +1,198 @@
+import os
+import mmap
+import json
+import zlib
+import struct
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Rekord w segmencie: długość i CRC32 danych, potem dane bloku
+RECORD_HEADER = struct.Struct('>II')
+# Wpis indeksu dla każdej wysokości: numer segmentu, offset rekordu, długość danych
+INDEX_ENTRY = struct.Struct('>IQI')
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+class BlockStore:
+    """
+    Append-only on-disk block store. Blocks are written as length-prefixed,
+    CRC-protected records to segment files; a fixed-width index maps every height
+    to its record. Records are never rewritten - replacing a block appends a new
+    record and repoints its index entry. Reads go through memory-mapped segments.
+    """
+
+    def __init__(self, path, segment_size=DEFAULT_SEGMENT_SIZE, fsync=True):
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.maps = {}
+        os.makedirs(path, exist_ok=True)
+
+        self.index_path = os.path.join(path, 'index.dat')
+        if not os.path.exists(self.index_path):
+            open(self.index_path, 'wb').close()
+        # Index entries are overwritten in place, so it cannot be opened in append mode
+        self.index_file = open(self.index_path, 'r+b')
+        self.entries = []
+        self.segment_id = 0
+        self.segment_file = None
+        self.recover()
+
+    def segment_path(self, segment_id):
+        return os.path.join(self.path, f'segment_{segment_id:05d}.dat')
+
+    def recover(self):
+        """Load the index and drop everything after the first entry whose record is missing or damaged"""
+        self.index_file.seek(0)
+        raw_index = self.index_file.read()
+        usable = len(raw_index) - len(raw_index) % INDEX_ENTRY.size
+        entries = [INDEX_ENTRY.unpack_from(raw_index, offset) for offset in range(0, usable, INDEX_ENTRY.size)]
+
+        valid = 0
+        for segment_id, offset, length in entries:
+            if not self.record_is_valid(segment_id, offset, length):
+                break
+            valid += 1
+        # Segments may be truncated below, so no mapping made during the scan may outlive it
+        self.close_maps()
+        if valid < len(entries) or usable < len(raw_index):
+            logger.warning("Block store recovery: keeping %s of %s indexed blocks", valid, len(entries))
+            self.index_file.truncate(valid * INDEX_ENTRY.size)
+            self.sync(self.index_file)
+        self.entries = entries[:valid]
+
+        segments = sorted(
+            int(name[len('segment_'):-len('.dat')])
+            for name in os.listdir(self.path)
+            if name.startswith('segment_') and name.endswith('.dat')
+        )
+        self.segment_id = segments[-1] if segments else 0
+
+        # Torn write at the end of the active segment - cut it off
+        valid_end = max(
+            (offset + RECORD_HEADER.size + length
+             for segment_id, offset, length in self.entries if segment_id == self.segment_id),
+            default=0
+        )
+        self.segment_file = open(self.segment_path(self.segment_id), 'a+b')
+        if os.path.getsize(self.segment_path(self.segment_id)) > valid_end:
+            logger.warning("Block store recovery: truncating segment %s to %s bytes", self.segment_id, valid_end)
+            self.segment_file.truncate(valid_end)
+            self.sync(self.segment_file)
+
+    def record_is_valid(self, segment_id, offset, length):
+        try:
+            record = self.read_record(segment_id, offset)
+        except (OSError, ValueError, struct.error):
+            return False
+        return record is not None and len(record) == length
+
+    def sync(self, file):
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+
+    def segment_map(self, segment_id, end):
+        """Memory map of a segment that covers at least `end` bytes"""
+        current = self.maps.get(segment_id)
+        if current is not None and len(current) >= end:
+            return current
+        if current is not None:
+            current.close()
+        with open(self.segment_path(segment_id), 'rb') as file:
+            current = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.maps[segment_id] = current
+        if len(current) < end:
+            raise ValueError(f"Record beyond the end of segment {segment_id}")
+        return current
+
+    def read_record(self, segment_id, offset):
+        """Payload of the record at the given position, None if its CRC does not match"""
+        data = self.segment_map(segment_id, offset + RECORD_HEADER.size)
+        length, crc = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        data = self.segment_map(segment_id, start + length)
+        payload = data[start:start + length]
+        if zlib.crc32(payload) & 0xFFFFFFFF != crc:
+            return None
+        return payload
+
+    def write_record(self, payload):
+        """Append a record to the active segment, rolling over to a new one when it is full"""
+        self.segment_file.seek(0, os.SEEK_END)
+        offset = self.segment_file.tell()
+        if offset and offset + RECORD_HEADER.size + len(payload) > self.segment_size:
+            self.segment_file.close()
+            self.segment_id += 1
+            self.segment_file = open(self.segment_path(self.segment_id), 'a+b')
+            offset = 0
+
+        self.segment_file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload) & 0xFFFFFFFF))
+        self.segment_file.write(payload)
+        # Dane muszą trafić na dysk przed wpisem indeksu, który na nie wskazuje
+        self.sync(self.segment_file)
+        return self.segment_id, offset, len(payload)
+
+    def write_index_entry(self, height, entry):
+        self.index_file.seek(height * INDEX_ENTRY.size)
+        self.index_file.write(INDEX_ENTRY.pack(*entry))
+        self.sync(self.index_file)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def encode(block_data):
+        """Records hold JSON; a block that is already serialized is stored as it is"""
+        if isinstance(block_data, bytes):
+            return block_data
+        return json.dumps(block_data).encode()
+
+    def append(self, block_data):
+        """Store a block dict (or its JSON bytes) as the next height"""
+        payload = self.encode(block_data)
+        with self.lock:
+            entry = self.write_record(payload)
+            self.write_index_entry(len(self.entries), entry)
+            self.entries.append(entry)
+
+    def put(self, height, block_data):
+        """Replace the block stored at an existing height"""
+        payload = self.encode(block_data)
+        with self.lock:
+            if height >= len(self.entries):
+                raise IndexError(f"No block stored at height {height}")
+            entry = self.write_record(payload)
+            self.write_index_entry(height, entry)
+            self.entries[height] = entry
+
+    def truncate(self, length):
+        """Forget all blocks from the given height on (e.g. before storing a fork)"""
+        with self.lock:
+            if length >= len(self.entries):
+                return
+            del self.entries[length:]
+            self.index_file.truncate(length * INDEX_ENTRY.size)
+            self.sync(self.index_file)
+
+    def read(self, height):
+        with self.lock:
+            segment_id, offset, _ = self.entries[height]
+            payload = self.read_record(segment_id, offset)
+        if payload is None:
+            raise ValueError(f"Stored block {height} failed CRC verification")
+        return json.loads(payload)
+
+    def close_maps(self):
+        for data in self.maps.values():
+            data.close()
+        self.maps.clear()
+
+    def close(self):
+        with self.lock:
+            self.close_maps()
+            self.segment_file.close()
+            self.index_file.close()
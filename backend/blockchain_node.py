@@ -1,6 +1,6 @@
 import os
 import random
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, g
 import hashlib
 import time
 import json
@@ -10,51 +10,204 @@ import base64
 from PIL import Image
 import io
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import struct
+import weakref
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from mining import SingleProcessMiningEngine, create_mining_engine, encode_nonce
+from merkle import MerkleTree, has_duplicate_leaves, merkle_root, verify_merkle_proof
+from block_store import BlockStore
+from blob_store import BlobStore
+import wire
+from peer_client import PeerClient
+from fanout import FanOut
+from peer_state import PeerStates, OPEN
+from mempool import Mempool
+from mining_service import MiningService, BlockPolicy
+from integrity import IntegrityScanner
+from metrics import NodeMetrics, TEXT_CONTENT_TYPE
+from wire import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE
+
+# Konfiguracja handlerów w log_config.configure_logging() (app.py)
 logger = logging.getLogger(__name__)
+# Zdarzenia per transakcja / blok - poziom DEBUG, próbkowane przez log_config
+record_logger = logging.getLogger(__name__ + '.records')
+
+# Maksymalna liczba bloków w jednej stronie odpowiedzi JSON z /chain
+CHAIN_PAGE_LIMIT = int(os.getenv('CHAIN_PAGE_LIMIT', 100))
+# Maksymalna liczba bloków w jednej odpowiedzi /blocks
+BLOCK_RANGE_LIMIT = int(os.getenv('BLOCK_RANGE_LIMIT', 500))
+# Maksymalna liczba transakcji w jednym żądaniu /transactions/batch
+TRANSACTION_BATCH_LIMIT = int(os.getenv('TRANSACTION_BATCH_LIMIT', 1000))
+# Potwierdzenia (łącznie z własnym) wymagane do przyjęcia transakcji - najwyżej tyle, ile węzłów w sieci
+TRANSACTION_CONFIRMATIONS = 6
+# Limit czasu potwierdzenia paczki transakcji - dla pojedynczego węzła i dla całego kworum
+TRANSACTION_BATCH_TIMEOUT = 10
+# Stały znacznik czasu bloku genesis - wszystkie węzły startują z identycznym blokiem 0
+GENESIS_TIMESTAMP = 1704067200.0
+# Endpointy, których odpowiedzi liczą się jako bajty wysłane przy synchronizacji
+SYNC_ENDPOINTS = ('get_chain', 'get_blocks', 'get_block')
+
+# Nagłówek bloku: index, previous_hash, merkle_root, timestamp (nonce doklejany na końcu)
+BLOCK_HEADER_FORMAT = '>Q32s32sd'
+
+
+def decode_block_response(response):
+    """Block dict from a peer response in either wire format"""
+    if response.headers.get('Content-Type', '').startswith(BINARY_CONTENT_TYPE):
+        return wire.decode_block(response.content)
+    return response.json()
+
+
+def hash_to_bytes(hex_hash):
+    """Convert a hex block hash to 32 raw bytes (non-hash values such as the genesis '0' are digested)"""
+    if len(hex_hash) == 64:
+        try:
+            return bytes.fromhex(hex_hash)
+        except ValueError:
+            pass
+    return hashlib.sha256(hex_hash.encode()).digest()
+
+
+def pack_hash(value):
+    """32 raw bytes for a hex hash; other values (the genesis '0', a corrupted hash) stay strings"""
+    if len(value) == 64:
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            pass
+    return value
+
+
+def unpack_hash(value):
+    return value.hex() if isinstance(value, bytes) else value
+
+
+class Confirmations:
+    """
+    Set of confirming peers kept as a bitmask. Peer addresses are interned once per
+    process, so a confirmation costs one bit instead of a string in a per-transaction set.
+    """
+    __slots__ = ('mask',)
+    peers = []
+    bits = {}
+    lock = threading.Lock()
+
+    def __init__(self, peers=()):
+        self.mask = 0
+        self.update(peers)
+
+    @classmethod
+    def bit(cls, peer):
+        bit = cls.bits.get(peer)
+        if bit is None:
+            with cls.lock:
+                bit = cls.bits.get(peer)
+                if bit is None:
+                    bit = cls.bits[peer] = len(cls.peers)
+                    cls.peers.append(peer)
+        return bit
+
+    def add(self, peer):
+        bit = 1 << self.bit(peer)
+        with self.lock:
+            self.mask |= bit
+
+    def update(self, peers):
+        for peer in peers:
+            self.add(peer)
+
+    def __contains__(self, peer):
+        bit = self.bits.get(peer)
+        return bit is not None and bool(self.mask >> bit & 1)
+
+    def __len__(self):
+        return bin(self.mask).count('1')
+
+    def __iter__(self):
+        mask = self.mask
+        return iter([peer for bit, peer in enumerate(list(self.peers)) if mask >> bit & 1])
+
+
+class Frozen:
+    """Objects that become read-only once their block is committed to the chain"""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if getattr(self, 'frozen', False):
+            raise AttributeError(f"{type(self).__name__} is committed and read-only - cannot set {name}")
+        object.__setattr__(self, name, value)
+
+
+class Transaction(Frozen):
+    __slots__ = ('data', 'type', 'timestamp', 'crc_bytes', 'confirmations', 'frozen')
 
-class Transaction:
     def __init__(self, data, transaction_type="generic"):
+        self.frozen = False
         self.data = data
         self.timestamp = time.time()
         self.type = transaction_type
         self.crc = self.calculate_crc()
-        self.confirmations = set()
+        self.confirmations = Confirmations()
         # Log transaction creation with CRC
-        logger.info(
-            f"Created new transaction - Type: {transaction_type}, CRC: {self.crc}",
-            extra={'node_id': os.getenv('NODE_ID', 'unknown')}
-        )
+        record_logger.debug("Created new transaction - Type: %s, CRC: %s", transaction_type, self.crc)
 
     def calculate_crc(self):
         """Calculate CRC32 checksum for data verification"""
         if isinstance(self.data, bytes):
             crc = format(zlib.crc32(self.data) & 0xFFFFFFFF, '08x')
+        elif isinstance(self.data, str):
+            crc = format(zlib.crc32(self.data.encode()) & 0xFFFFFFFF, '08x')
         else:
-            crc = format(zlib.crc32(str(self.data).encode()) & 0xFFFFFFFF, '08x')
-        logger.info(
-            f"Calculated CRC: {crc} for data type: {type(self.data)}",
-            extra={'node_id': os.getenv('NODE_ID', 'unknown')}
-        )
+            # Structured data (e.g. image blob references) - key order must not change the CRC
+            crc = format(zlib.crc32(json.dumps(self.data, sort_keys=True).encode()) & 0xFFFFFFFF, '08x')
+        record_logger.debug("Calculated CRC: %s for data type: %s", crc, type(self.data))
         return crc
 
+    @property
+    def crc(self):
+        return self.crc_bytes.hex()
+
+    @crc.setter
+    def crc(self, value):
+        self.crc_bytes = bytes.fromhex(value)
+
     def verify_crc(self):
         """Verify data integrity using CRC32 checksum"""
         current_crc = self.calculate_crc()
         is_valid = self.crc == current_crc
-        logger.info(
-            f"CRC Verification - Stored: {self.crc}, Calculated: {current_crc}, Valid: {is_valid}",
-            extra={'node_id': os.getenv('NODE_ID', 'unknown')}
-        )
+        record_logger.debug("CRC Verification - Stored: %s, Calculated: %s, Valid: %s", self.crc, current_crc, is_valid)
         return is_valid
 
+    def calculate_digest(self):
+        """SHA-256 of the transaction content, used as its Merkle leaf (confirmations are not part of it)"""
+        digest = hashlib.sha256(json.dumps({
+            'type': self.type,
+            'timestamp': self.timestamp,
+            'crc': self.crc
+        }, sort_keys=True).encode())
+        if isinstance(self.data, bytes):
+            digest.update(self.data)
+        else:
+            digest.update(json.dumps(self.data, sort_keys=True).encode())
+        return digest.digest()
+
+    @staticmethod
+    def image_reference(blob_hash, size):
+        """Data of an image transaction - the bytes themselves live in the blob store"""
+        return {"blob": blob_hash, "size": size}
+
+    @property
+    def blob_hash(self):
+        """Content hash of the referenced image blob, None for inline data"""
+        if self.type == "image" and isinstance(self.data, dict):
+            return self.data.get("blob")
+        return None
+
     def to_dict(self):
         """Convert transaction to dictionary with proper data type handling"""
-        if self.type == "image":
+        if self.type == "image" and not isinstance(self.data, dict):
             # Ensure data is in bytes format for images
             if not isinstance(self.data, bytes):
                 # If corrupted to string, convert back to bytes
@@ -76,68 +229,301 @@ class Transaction:
             "confirmations": list(self.confirmations)
         }
 
+    @staticmethod
+    def restore(data, transaction_type, timestamp, crc, confirmations=()):
+        """Rebuild a received transaction as it is - the CRC is not recomputed (verify_crc checks it)"""
+        transaction = Transaction.__new__(Transaction)
+        transaction.frozen = False
+        transaction.data = data
+        transaction.type = transaction_type
+        transaction.timestamp = timestamp
+        transaction.crc = crc
+        transaction.confirmations = Confirmations(confirmations)
+        return transaction
+
     @staticmethod
     def from_dict(data_dict):
         """Create transaction from dictionary with proper data type handling"""
-        if data_dict["type"] == "image":
-            data = base64.b64decode(data_dict["data"])
-        else:
-            data = data_dict["data"]
-        
-        transaction = Transaction(data, data_dict["type"])
-        transaction.timestamp = data_dict["timestamp"]
-        transaction.crc = data_dict["crc"]
-        transaction.confirmations = set(data_dict["confirmations"])
-        return transaction
-class Block:
+        return Transaction.restore(
+            decode_payload(data_dict),
+            data_dict["type"],
+            data_dict["timestamp"],
+            data_dict["crc"],
+            data_dict["confirmations"]
+        )
+
+
+def decode_payload(data_dict):
+    """Transaction data as kept in memory - inline image payloads from older nodes arrive base64-encoded"""
+    if data_dict["type"] == "image" and isinstance(data_dict["data"], str):
+        return base64.b64decode(data_dict["data"])
+    return data_dict["data"]
+
+class Block(Frozen):
+    # Hashe trzymane jako 32 bajty, na zewnątrz wystawiane jako hex
+    __slots__ = (
+        'index', 'previous_hash_bytes', 'transactions', 'timestamp', 'nonce',
+        'merkle_tree', 'hash_bytes', 'serialized', 'frozen'
+    )
+    # Węzły powiadamiane o każdej zmianie bloku w miejscu (block_changed) - m.in. kasują skróty łańcucha
+    observers = weakref.WeakSet()
+
     def __init__(self, index, previous_hash, transactions, timestamp=None):
-        self.node_id = os.getenv('NODE_ID', 'unknown')
+        self.frozen = False
         self.index = index
         self.previous_hash = previous_hash
         self.transactions = transactions
         self.timestamp = timestamp or time.time()
         self.nonce = 0
-        self.hash = self.calculate_hash()
-        logger.info(
-            f"Created new block - Index: {index}, Previous Hash: {previous_hash}, Initial Hash: {self.hash}",
-            extra={'node_id': self.node_id}
+        self.merkle_tree = MerkleTree([t.calculate_digest() for t in transactions])
+        self.hash = self.calculate_hash_from_root()
+        # Zserializowane postacie bloku (JSON, binarna, ETag) - liczone raz, kasowane przy naprawie
+        self.serialized = {}
+        record_logger.debug(
+            "Created new block - Index: %s, Previous Hash: %s, Initial Hash: %s", index, previous_hash, self.hash
         )
 
+    @property
+    def hash(self):
+        return unpack_hash(self.hash_bytes)
+
+    @hash.setter
+    def hash(self, value):
+        self.hash_bytes = pack_hash(value)
+
+    @property
+    def previous_hash(self):
+        return unpack_hash(self.previous_hash_bytes)
+
+    @previous_hash.setter
+    def previous_hash(self, value):
+        self.previous_hash_bytes = pack_hash(value)
+
+    @property
+    def merkle_root(self):
+        return self.merkle_tree.root.hex()
+
+    def freeze(self):
+        """Make a committed block and its transactions read-only"""
+        for transaction in self.transactions:
+            object.__setattr__(transaction, 'frozen', True)
+        object.__setattr__(self, 'transactions', tuple(self.transactions))
+        object.__setattr__(self, 'frozen', True)
+
+    @contextmanager
+    def unfrozen(self):
+        """Let a repair path modify a committed block; its cached serializations are dropped afterwards"""
+        was_frozen = self.frozen
+        object.__setattr__(self, 'frozen', False)
+        for transaction in self.transactions:
+            object.__setattr__(transaction, 'frozen', False)
+        try:
+            yield self
+        finally:
+            self.invalidate()
+            if was_frozen:
+                self.freeze()
+            for observer in list(Block.observers):
+                observer.block_changed(self)
+
+    def calculate_merkle_root(self):
+        return merkle_root([t.calculate_digest() for t in self.transactions]).hex()
+
+    def merkle_leaves(self):
+        return self.merkle_tree.leaves
+
+    def is_transaction_intact(self, tx_index):
+        """Check a transaction against the Merkle leaf recorded when the block was built"""
+        return self.transactions[tx_index].calculate_digest() == self.merkle_tree.leaves[tx_index]
+
+    def transaction_proof(self, tx_index):
+        return self.merkle_tree.proof(tx_index)
+
+    def header_prefix(self, merkle_root_hex=None):
+        """Fixed-layout block header without the nonce"""
+        return struct.pack(
+            BLOCK_HEADER_FORMAT,
+            self.index,
+            hash_to_bytes(self.previous_hash),
+            bytes.fromhex(merkle_root_hex or self.calculate_merkle_root()),
+            self.timestamp
+        )
+
+    def calculate_hash_from_root(self):
+        """Hash of the header using the stored Merkle root instead of re-hashing the transactions"""
+        header = self.header_prefix(self.merkle_root) + encode_nonce(self.nonce)
+        return hashlib.sha256(header).hexdigest()
+
     def calculate_hash(self):
-        block_string = json.dumps({
+        """Hash of the block header - transactions are covered through their Merkle root"""
+        header = self.header_prefix() + encode_nonce(self.nonce)
+        new_hash = hashlib.sha256(header).hexdigest()
+        return new_hash
+
+    def mine_block(self, difficulty, engine=None):
+        engine = engine or SingleProcessMiningEngine()
+        logger.info("Starting mining block %s - Target difficulty: %s, Engine: %s", self.index, difficulty, engine.name)
+        # Transactions were hashed once into merkle_root; each attempt only hashes the nonce on top of the header state
+        result = engine.search(self.header_prefix(self.merkle_root), difficulty)
+        self.nonce = result.nonce
+        self.hash = result.hash
+        self.invalidate()
+        
+        logger.info(
+            "Successfully mined block %s - Final Hash: %s, Nonce: %s, Attempts: %s, Hash rate: %.0f H/s",
+            self.index, self.hash, self.nonce, result.attempts, result.hash_rate
+        )
+        return result
+
+    def to_dict(self):
+        return {
             'index': self.index,
             'previous_hash': self.previous_hash,
+            'timestamp': self.timestamp,
             'transactions': [t.to_dict() for t in self.transactions],
+            'hash': self.hash,
+            'nonce': self.nonce
+        }
+
+    def cached(self, kind, build):
+        """Serialized form of the block, built on first use and reused until invalidate()"""
+        payload = self.serialized.get(kind)
+        if payload is None:
+            payload = self.serialized[kind] = build(self)
+        return payload
+
+    def json_bytes(self):
+        return self.cached('json', lambda block: json.dumps(block.to_dict()).encode())
+
+    def wire_bytes(self):
+        return self.cached('wire', wire.encode_block)
+
+    @property
+    def etag(self):
+        return self.cached('etag', lambda block: hashlib.sha256(block.json_bytes()).hexdigest())
+
+    def invalidate(self):
+        """Drop the cached serializations - every path that mutates a stored block must call it"""
+        self.serialized.clear()
+
+    def header_dict(self):
+        """Block without its transactions - enough to follow and check the chain of hashes"""
+        return {
+            'index': self.index,
+            'previous_hash': self.previous_hash,
             'timestamp': self.timestamp,
+            'merkle_root': self.merkle_root,
+            'transaction_count': len(self.transactions),
+            'hash': self.hash,
             'nonce': self.nonce
-        }, sort_keys=True).encode()
-        
-        new_hash = hashlib.sha256(block_string).hexdigest()
-        return new_hash
+        }
 
-    def mine_block(self, difficulty):
-        logger.info(f"czy tu jestem start minig") 
-        target = '0' * difficulty
-        logger.info(
-            f"Starting mining block {self.index} - Target difficulty: {difficulty}",
-            extra={'node_id': self.node_id}
+    @staticmethod
+    def restore(index, previous_hash, transactions, timestamp, nonce, block_hash, leaves=None):
+        """Rebuild a received block with its hash and nonce; Merkle leaves already computed can be passed in"""
+        block = Block.__new__(Block)
+        block.frozen = False
+        block.index = index
+        block.previous_hash = previous_hash
+        block.transactions = transactions
+        block.timestamp = timestamp
+        block.nonce = nonce
+        block.merkle_tree = MerkleTree(leaves if leaves is not None else [t.calculate_digest() for t in transactions])
+        block.hash = block_hash
+        block.serialized = {}
+        return block
+
+    @staticmethod
+    def from_dict(block_data):
+        """Create block from dictionary, keeping the received hash and nonce"""
+        return Block.restore(
+            block_data['index'],
+            block_data['previous_hash'],
+            [Transaction.from_dict(tx_data) for tx_data in block_data['transactions']],
+            block_data['timestamp'],
+            block_data.get('nonce', 0),
+            block_data['hash']
         )
-        iterations = 0
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
-            iterations += 1
-            if iterations % 1000 == 0:  # Log progress every 1000 iterations
-                logger.info(
-                    f"Mining progress - Block: {self.index}, Nonce: {self.nonce}, Current Hash: {self.hash}",
-                    extra={'node_id': self.node_id}
-                )
-        
-        logger.info(
-            f"Successfully mined block {self.index} - Final Hash: {self.hash}, Nonce: {self.nonce}",
-            extra={'node_id': self.node_id}
+
+
+class TransactionView:
+    """
+    Read-only transaction backed by the dict it was received as. The payload is decoded
+    only when `data` is read and is not kept, so CRC and digest checks over a long chain
+    never hold more than one decoded payload at a time.
+    """
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    type = property(lambda self: self.raw['type'])
+    timestamp = property(lambda self: self.raw['timestamp'])
+    crc = property(lambda self: self.raw['crc'])
+    confirmations = property(lambda self: set(self.raw['confirmations']))
+
+    @property
+    def data(self):
+        return decode_payload(self.raw)
+
+    calculate_crc = Transaction.calculate_crc
+    verify_crc = Transaction.verify_crc
+    calculate_digest = Transaction.calculate_digest
+
+    def materialize(self):
+        return Transaction.from_dict(self.raw)
+
+
+class BlockView:
+    """
+    Read-only block over a received dict, used to validate synchronized chains before
+    anything is decoded into Block/Transaction objects. Merkle leaves are computed once and
+    handed over when the block is adopted.
+    """
+    __slots__ = ('raw', 'transactions', 'leaves')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.transactions = [TransactionView(tx_data) for tx_data in raw['transactions']]
+        self.leaves = None
+
+    index = property(lambda self: self.raw['index'])
+    previous_hash = property(lambda self: self.raw['previous_hash'])
+    timestamp = property(lambda self: self.raw['timestamp'])
+    hash = property(lambda self: self.raw['hash'])
+    nonce = property(lambda self: self.raw.get('nonce', 0))
+
+    def merkle_leaves(self):
+        if self.leaves is None:
+            self.leaves = [t.calculate_digest() for t in self.transactions]
+        return self.leaves
+
+    def calculate_hash(self):
+        root = merkle_root(self.merkle_leaves()).hex()
+        return hashlib.sha256(Block.header_prefix(self, root) + encode_nonce(self.nonce)).hexdigest()
+
+    def materialize(self):
+        return Block.restore(
+            self.index,
+            self.previous_hash,
+            [t.materialize() for t in self.transactions],
+            self.timestamp,
+            self.nonce,
+            self.hash,
+            leaves=self.leaves
         )
-        logger.info(f"czy tu jestem end minig") 
+
+# Pola, które można pobrać dla zakresu bloków przez /blocks?fields=...
+BLOCK_FIELDS = {
+    'index': lambda block: block.index,
+    'hash': lambda block: block.hash,
+    'previous_hash': lambda block: block.previous_hash,
+    'timestamp': lambda block: block.timestamp,
+    'nonce': lambda block: block.nonce,
+    'merkle_root': lambda block: block.merkle_root,
+    'crc': lambda block: [t.crc for t in block.transactions],
+    'transactions': lambda block: [t.to_dict() for t in block.transactions],
+}
 
 def generate_node_addresses(start_port, num_nodes):
     return [f"http://node{i}:{5000 + i}" for i in range(1, num_nodes + 1)]
@@ -145,84 +531,253 @@ def generate_node_addresses(start_port, num_nodes):
 class BlockchainNode:
     def __init__(self, node_id, start_port=5001, num_nodes=6, difficulty=2):
         self.node_id = node_id
-        self.chain = [self.create_genesis_block()]
         self.difficulty = difficulty
-        self.pending_transactions = []
+        data_dir = os.path.join(os.getenv('BLOCKCHAIN_DATA_DIR', 'data'), node_id)
+        self.store = BlockStore(data_dir, fsync=os.getenv('BLOCKCHAIN_FSYNC', 'true').lower() == 'true')
+        self.blobs = BlobStore(os.path.join(data_dir, 'blobs'))
+        # Format wymiany z innymi węzłami: 'binary' (domyślnie) lub 'json'
+        self.binary_wire = os.getenv('WIRE_FORMAT', 'binary') == 'binary'
+        self.accept_header = (
+            f'{BINARY_CONTENT_TYPE}, {JSON_CONTENT_TYPE};q=0.5' if self.binary_wire else JSON_CONTENT_TYPE
+        )
+        # Watermark: chain[0..verified_height] has been fully validated and chain[verified_height].hash == verified_tip_hash
+        self.verified_height = -1
+        self.verified_tip_hash = None
+        # Liczniki i histogramy wystawiane na /blockchain/metrics - już load_chain liczy weryfikacje
+        self.metrics = NodeMetrics(self)
+        # Każda zmiana łańcucha i magazynu odbywa się pod tą blokadą (reentrant - naprawy wołają się nawzajem)
+        self.lock = threading.RLock()
+        # Skumulowany skrót łańcucha H_n dla każdej wysokości - obcinany przy każdej zmianie bloku
+        self.digest_cache = []
+        self.digest_lock = threading.Lock()
+        Block.observers.add(self)
+        self.chain = self.load_chain()
+        # Oczekujące transakcje indeksowane skrótem treści
+        self.mempool = Mempool.from_env()
+        # Ile transakcji i bajtów trafia do bloku i kiedy zaczynać kopanie
+        self.block_policy = BlockPolicy.from_env()
         self.nodes = self.generate_docker_node_addresses(num_nodes)
-        self.lock = threading.Lock()
-        self.mining_status = {"is_mining": False, "progress": 0}
-        self.health_check_interval = 30
-        self.failed_nodes = {}
-        self.start_health_check()
+        # W mniejszej sieci transakcję potwierdzają wszystkie węzły
+        self.transaction_confirmations = min(TRANSACTION_CONFIRMATIONS, len(self.nodes) + 1)
+        # Wspólny klient HTTP z pulą połączeń keep-alive dla każdego węzła
+        self.http = PeerClient.from_env()
+        self.http.latency = self.metrics.peer_latency
+        # Wspólna pula wątków do równoległych zapytań do wszystkich węzłów
+        self.fanout = FanOut.from_env()
+        # Kopiowanie obrazów z innych węzłów - kilka wątków, żeby nie zajmować puli kworum
+        self.blob_replication = ThreadPoolExecutor(
+            max_workers=int(os.getenv('BLOB_REPLICATION_WORKERS', 2)), thread_name_prefix='blob-replication'
+        )
+        self.replicating_blobs = set()
+        self.replication_lock = threading.Lock()
+        self.mining_status = {"is_mining": False, "progress": 0, "hash_rate": 0, "job": None}
+        self.mining_engine = create_mining_engine()
+        # Stan każdego węzła (healthy / suspect / open) - martwe węzły są pomijane
+        self.peer_states = PeerStates.from_env(self.nodes)
+        self.http.peer_states = self.peer_states
         # Initial synchronization with network
         self.initial_sync()
-        self.start_hash_verification()
-        self.start_data_verification()
+        # Jeden wątek sprawdza stan węzłów, hashe i dane zamiast trzech osobnych pętli
+        self.integrity = IntegrityScanner.from_env(self)
+        self.integrity.start()
+        # Kopanie w tle - żądania HTTP tylko kolejkują zadanie
+        self.miner = MiningService.from_env(self)
 
-    def start_data_verification(self):
-        """Start periodic data verification"""
-        def verify_data_periodically():
-            while True:
-                self.verify_and_correct_data()
-                time.sleep(30)  # Check every 30 seconds
-            
-        thread = threading.Thread(target=verify_data_periodically, daemon=True)
-        thread.start()
+    def fetch_block_range(self, node, start, end, fields=None):
+        """
+        Blocks [start, end) of a peer in as few requests as the range limit allows.
+        With fields only the selected values are returned, otherwise full block dicts.
+        """
+        blocks = []
+        while start < end:
+            params = {'from': start, 'to': end}
+            if fields:
+                params['fields'] = ','.join(fields)
+            response = self.http.get(
+                f'{node}/blockchain/blocks',
+                params=params,
+                headers={'Accept': JSON_CONTENT_TYPE if fields else self.accept_header},
+                timeout=10
+            )
+            if response.status_code != 200:
+                logger.error("Failed to get blocks %s-%s from node %s: %s", start, end, node, response.status_code)
+                break
 
+            if response.headers.get('Content-Type', '').startswith(BINARY_CONTENT_TYPE):
+                page = wire.decode_blocks(response.content)
+                next_start = response.headers.get('X-Next-From')
+            else:
+                page_data = response.json()
+                page = page_data['blocks']
+                next_start = page_data.get('next')
+            blocks.extend(page)
+            if next_start is None or not page:
+                break
+            start = int(next_start)
+        return blocks
 
     def verify_and_correct_hashes(self):
         """Verify block hashes across nodes and correct any corrupted ones"""
         logger.info("Starting hash verification across nodes")
         
+        # Collect hashes of all blocks from other nodes, one range request per node
+        remote_hashes = []
+        for node in self.live_nodes():
+            try:
+                blocks = self.fetch_block_range(node, 0, len(self.chain), fields=['hash'])
+                remote_hashes.append({block['index']: block['hash'] for block in blocks})
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                logger.error("Error getting block hashes from node %s: %s", node, e)
+
         for block_index in range(len(self.chain)):
             current_block = self.chain[block_index]
-            hash_counts = {} 
+            hash_counts = {}
             correct_hash = None
-            
-            # Collect hashes from other nodes
-            for node in self.nodes:
-                try:
-                    response = requests.get(f'{node}/blockchain/block/{block_index}', timeout=5)
-                    if response.status_code == 200:
-                        block_data = response.json()
-                        remote_hash = block_data['hash']
-                        hash_counts[remote_hash] = hash_counts.get(remote_hash, 0) + 1
-                        
-                        if hash_counts[remote_hash] > len(self.nodes) / 2:
-                            correct_hash = remote_hash
-                            break
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Error getting block from node {node}: {e}")
+
+            for hashes in remote_hashes:
+                remote_hash = hashes.get(block_index)
+                if remote_hash is None:
                     continue
+                hash_counts[remote_hash] = hash_counts.get(remote_hash, 0) + 1
+                if hash_counts[remote_hash] > len(self.nodes) / 2:
+                    correct_hash = remote_hash
+                    break
             
             # If we found a consensus hash and it's different from our current hash
             if correct_hash and current_block.hash != correct_hash:
-                logger.warning(f"Hash mismatch detected in block {block_index}")
-                logger.warning(f"Local hash: {current_block.hash}")
-                logger.warning(f"Consensus hash: {correct_hash}")
-                
-                # Verify the consensus hash meets difficulty requirement
-                if correct_hash[:self.difficulty] == "0" * self.difficulty:
-                    # Update the corrupted hash
-                    self.chain[block_index].hash = correct_hash
-                    logger.info(f"Corrected hash for block {block_index}")
-                else:
-                    logger.error(f"Consensus hash does not meet difficulty requirement for block {block_index}")
+                self.correct_block_hash(block_index, correct_hash)
 
-    # Add periodic hash verification
-    def start_hash_verification(self):
-        """Start periodic hash verification"""
-        def verify_hashes_periodically():
-            while True:
-                self.verify_and_correct_hashes()
-                time.sleep(30)  # Check every 30 seconds
-                
-        thread = threading.Thread(target=verify_hashes_periodically, daemon=True)
-        thread.start()
+    def correct_block_hash(self, block_index, correct_hash):
+        """Replace a corrupted block hash with the one agreed on by the network"""
+        logger.warning("Hash mismatch detected in block %s", block_index)
+        logger.warning("Local hash: %s", self.chain[block_index].hash)
+        logger.warning("Consensus hash: %s", correct_hash)
+        
+        # Verify the consensus hash meets difficulty requirement
+        if correct_hash[:self.difficulty] == "0" * self.difficulty:
+            # Update the corrupted hash
+            with self.lock:
+                with self.chain[block_index].unfrozen() as block:
+                    block.hash = correct_hash
+                self.persist_block(block_index)
+                self.invalidate_watermark(block_index)
+            self.metrics.repairs.inc(1, 'hash')
+            logger.info("Corrected hash for block %s", block_index)
+            return True
+        logger.error("Consensus hash does not meet difficulty requirement for block %s", block_index)
+        return False
+
+    def chain_digest(self, height):
+        """
+        Rolling digest H_n = sha256(H_(n-1) || block_hash || tx_crcs) of the chain up to height n.
+        Cached per height and served from the cache; every path that changes a block drops the
+        cached values from its height on (invalidate_digests), so only new heights are hashed.
+        """
+        with self.digest_lock:
+            chain = self.chain
+            if not 0 <= height < len(chain):
+                return None
+            cache = self.digest_cache
+            if height < len(cache):
+                return cache[height].hex()
+            previous = cache[-1] if cache else b''
+            for index in range(len(cache), height + 1):
+                block = chain[index]
+                digest = hashlib.sha256(previous)
+                digest.update(block.hash.encode())
+                digest.update(''.join(t.crc for t in block.transactions).encode())
+                previous = digest.digest()
+                cache.append(previous)
+            return previous.hex()
+
+    def invalidate_digests(self, index):
+        """Drop cached chain digests from the given height on - call after the chain has changed"""
+        with self.digest_lock:
+            del self.digest_cache[index:]
+
+    def block_changed(self, block):
+        """A block was modified in place (Block.unfrozen) - forget digests if it is one of ours"""
+        if block.index < len(self.chain) and self.chain[block.index] is block:
+            self.invalidate_digests(block.index)
+
+    def fetch_peer_digest(self, node, height):
+        """Chain digest of a peer at the given height, None if it has no block there or is unreachable"""
+        try:
+            response = self.http.get(f'{node}/blockchain/digest', params={'height': height}, timeout=5)
+            if response.status_code == 200:
+                return response.json()['digest']
+        except requests.exceptions.RequestException as e:
+            logger.error("Error getting chain digest from node %s: %s", node, e)
+        return None
+
+    def find_divergence(self, node, height):
+        """Binary search for the first height at which a peer's chain digest differs from ours"""
+        low, high = 0, height
+        while low < high:
+            middle = (low + high) // 2
+            if self.fetch_peer_digest(node, middle) == self.chain_digest(middle):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def locate_divergence(self, height):
+        """
+        Compare chain digests at our tip with all peers - one request each. Returns None when
+        most responding peers agree with us, otherwise the first height at which our chain
+        differs from the digest most peers report.
+        """
+        local = self.chain_digest(height)
+        remote = self.fanout.run(
+            self.live_nodes(), lambda node: self.fetch_peer_digest(node, height),
+            accept=lambda digest: digest is not None
+        ).accepted
+
+        agreeing = sum(1 for digest in remote.values() if digest == local)
+        differing = [digest for digest in remote.values() if digest != local]
+        if not differing or agreeing > len(remote) / 2:
+            return None
+
+        majority = max(set(differing), key=differing.count)
+        witness = next(node for node, digest in remote.items() if digest == majority)
+        divergence = self.find_divergence(witness, height)
+        logger.warning("Chain digest differs from node %s starting at height %s", witness, divergence)
+        return divergence
+
+    def collect_peer_digests(self, start=0):
+        """Per-block (hash, transaction CRCs) of every reachable peer from `start` on, one range request each"""
+        peer_digests = []
+        for node in self.live_nodes():
+            try:
+                blocks = self.fetch_block_range(node, start, len(self.chain), fields=['hash', 'crc'])
+                peer_digests.append({block['index']: (block['hash'], tuple(block['crc'])) for block in blocks})
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                logger.error("Error getting block digests from node %s: %s", node, e)
+        return peer_digests
+
+    def consensus_digest(self, index, peer_digests):
+        """Digest of a block reported by a majority of peers, None if there is no majority"""
+        counts = {}
+        for digests in peer_digests:
+            digest = digests.get(index)
+            if digest is not None:
+                counts[digest] = counts.get(digest, 0) + 1
+                if counts[digest] > len(self.nodes) / 2:
+                    return digest
+        return None
+
+    def is_block_consistent(self, index):
+        """Local check of one block: link to its predecessor, hash and transaction leaves"""
+        block = self.chain[index]
+        if index > 0 and block.previous_hash != self.chain[index - 1].hash:
+            return False
+        if block.hash != block.calculate_hash():
+            return False
+        return all(block.is_transaction_intact(i) for i in range(len(block.transactions)))
 
     def initial_sync(self):
         """Perform initial synchronization when node starts"""
-        logger.info(f"Node {self.node_id} performing initial synchronization")
+        logger.info("Node %s performing initial synchronization", self.node_id)
         max_retries = 3
         retry_count = 0
         
@@ -234,24 +789,19 @@ class BlockchainNode:
                 
                 for node in self.nodes:
                     try:
-                        response = requests.get(f'{node}/blockchain/chain', timeout=10)
-                        if response.status_code == 200:
-                            chain_data = response.json()
-                            chain_length = chain_data['length']
-                            
-                            if chain_length > max_length:
-                                # Validate the chain before accepting it
-                                chain = self.reconstruct_chain(chain_data['chain'])
-                                if chain and self.is_chain_valid(chain):
-                                    longest_chain = chain
-                                    max_length = chain_length
+                        # Only blocks past the common fork point are downloaded and validated
+                        chain = self.fetch_longer_chain(node, max_length, timeout=10)
+                        if chain:
+                            longest_chain = chain
+                            max_length = len(chain)
                     except requests.exceptions.RequestException as e:
-                        logger.warning(f"Could not connect to node {node} during initial sync: {e}")
+                        logger.warning("Could not connect to node %s during initial sync: %s", node, e)
                         continue
                 
                 if longest_chain:
-                    self.chain = longest_chain
-                    logger.info(f"Initial sync successful - Chain length: {len(self.chain)}")
+                    with self.lock:
+                        self.replace_chain(longest_chain)
+                    logger.info("Initial sync successful - Chain length: %s", len(self.chain))
                     self.verify_chain_integrity()  # Verify chain integrity after sync
                     return True
                 else:
@@ -259,13 +809,93 @@ class BlockchainNode:
                     return True
                     
             except Exception as e:
-                logger.error(f"Error during initial sync (attempt {retry_count + 1}): {e}")
+                logger.error("Error during initial sync (attempt %s): %s", retry_count + 1, e)
                 retry_count += 1
                 time.sleep(5)  # Wait before retry
                 
         logger.warning("Initial sync failed after maximum retries")
         return False
 
+    def build_locator(self):
+        """
+        Block locator for fork detection: the last 10 blocks one by one, then exponentially
+        sparser steps back to genesis, so its size is O(log n)
+        """
+        locator = []
+        index = len(self.chain) - 1
+        step = 1
+        while index > 0:
+            locator.append({'index': index, 'hash': self.chain[index].hash})
+            if len(locator) >= 10:
+                step *= 2
+            index -= step
+        locator.append({'index': 0, 'hash': self.chain[0].hash})
+        return locator
+
+    def find_fork_point(self, locator):
+        """Highest locator entry that matches our chain, -1 if the chains share no block"""
+        for entry in locator:
+            index = entry['index']
+            if 0 <= index < len(self.chain) and self.chain[index].hash == entry['hash']:
+                return index
+        return -1
+
+    def fetch_longer_chain(self, node, min_length, timeout=5):
+        """
+        Delta synchronization with a peer: compare (length, tip hash), locate the fork point
+        and download only the blocks past it. Returns the resulting chain if it is longer
+        than min_length and valid, None otherwise.
+        """
+        tip_response = self.http.get(f'{node}/blockchain/chain/tip', timeout=timeout)
+        if tip_response.status_code != 200:
+            logger.error("Failed to get chain tip from node %s: %s", node, tip_response.status_code)
+            return None
+
+        tip = tip_response.json()
+        if tip['length'] <= min_length:
+            logger.info("Remote chain from %s is not longer than current chain", node)
+            return None
+
+        locate_response = self.http.post(
+            f'{node}/blockchain/chain/locate',
+            json={'locator': self.build_locator()},
+            timeout=timeout
+        )
+        if locate_response.status_code != 200:
+            logger.error("Failed to locate fork point with node %s: %s", node, locate_response.status_code)
+            return None
+        fork_point = locate_response.json()['fork_point']
+
+        blocks_response = self.http.get(
+            f'{node}/blockchain/chain',
+            params={'from': fork_point + 1, 'format': 'ndjson'},
+            timeout=timeout,
+            stream=True
+        )
+        if blocks_response.status_code != 200:
+            logger.error("Failed to get blocks from node %s: %s", node, blocks_response.status_code)
+            return None
+
+        # Widoki bloków - dane transakcji dekodowane dopiero przy przyjęciu łańcucha
+        received = 0
+        blocks = []
+        try:
+            for line in blocks_response.iter_lines():
+                if line:
+                    received += len(line) + 1
+                    blocks.append(BlockView(json.loads(line)))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error("Failed to reconstruct chain from %s: %s", node, e)
+            return None
+        finally:
+            self.metrics.sync_bytes.inc(received, 'received')
+
+        chain = self.chain[:fork_point + 1] + blocks
+        logger.info("Received %s blocks from %s past fork point %s", len(blocks), node, fork_point)
+        if len(chain) > min_length and self.is_chain_valid(chain):
+            return chain
+        return None
+
     def reconstruct_chain(self, chain_data):
         """
         Simply reconstructs chain from JSON data
@@ -274,115 +904,210 @@ class BlockchainNode:
             reconstructed_chain = []
             
             for block_data in chain_data:
-                # Reconstruct transactions
-                transactions = []
-                for tx_data in block_data['transactions']:
-                    transaction = Transaction.from_dict(tx_data)
-                    transactions.append(transaction)
-
-                block = Block(
-                    block_data['index'],
-                    block_data['previous_hash'],
-                    transactions,
-                    block_data['timestamp'],
-                )
-                
-                block.hash = block_data['hash']
-                block.nonce = block_data.get('nonce', 0)
-                
-                reconstructed_chain.append(block)
+                reconstructed_chain.append(Block.from_dict(block_data))
                 
             return reconstructed_chain
                 
         except Exception as e:
-            logger.error(f"Error during chain reconstruction: {str(e)}")
+            logger.error("Error during chain reconstruction: %s", str(e))
             return None
 
     def synchronize_node(self, node):
         """Synchronizes with another node with improved error handling"""
-        logger.info(f"Starting synchronization with node {node}")
+        logger.info("Starting synchronization with node %s", node)
         try:
-            # Get the remote chain
-            chain_response = requests.get(f'{node}/blockchain/chain', timeout=10)
-            if chain_response.status_code != 200:
-                logger.error(f"Failed to get chain from node {node}: {chain_response.status_code}")
-                return False
-                
-            remote_chain_data = chain_response.json()
-            logger.info(f"Received chain data from {node}, length: {remote_chain_data['length']}")
-            
-            # Reconstruct and validate the chain
-            remote_chain = self.reconstruct_chain(remote_chain_data['chain'])
-            if not remote_chain:
-                logger.error(f"Failed to reconstruct chain from {node}")
-                return False
-            
             # If the remote chain is valid and longer, replace our chain
-            if len(remote_chain) > len(self.chain):
+            remote_chain = self.fetch_longer_chain(node, len(self.chain), timeout=10)
+            if remote_chain:
                 with self.lock:
-                    self.chain = remote_chain
+                    self.replace_chain(remote_chain)
                     self.verify_chain_integrity()
-                    logger.info(f"Successfully synchronized with {node}. New chain length: {len(self.chain)}")
+                    logger.info("Successfully synchronized with %s. New chain length: %s", node, len(self.chain))
                     return True
             else:
-                logger.info(f"Remote chain from {node} is not longer than current chain")
                 return False
                 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error during synchronization with {node}: {str(e)}")
+            logger.error("Network error during synchronization with %s: %s", node, str(e))
             return False
         except Exception as e:
-            logger.error(f"Unexpected error during synchronization with {node}: {str(e)}")
+            logger.error("Unexpected error during synchronization with %s: %s", node, str(e))
             return False
 
+    def live_nodes(self):
+        """Peers whose circuit is not open - the only ones broadcasts and verification contact"""
+        return self.peer_states.available(self.nodes)
+
     def check_nodes_health(self):
-        """Enhanced health check with better synchronization handling"""
+        """
+        Probe all peers due for a check in parallel and update their states. A chain is
+        downloaded only from the longest peer, and only when it is ahead of us.
+        """
         logger.info("Starting nodes health check")
-        for node in self.nodes:
+
+        def probe(node):
             try:
-                # Check node health
-                response = requests.get(f'{node}/blockchain/health', timeout=5)
+                response = self.http.get(f'{node}/blockchain/health', timeout=5)
                 if response.status_code == 200:
-                    if node in self.failed_nodes:
-                        logger.info(f"Node {node} recovered - initiating sync")
-                        if self.synchronize_node(node):
-                            del self.failed_nodes[node]
-                            logger.info(f"Successfully synchronized with recovered node {node}")
-                        else:
-                            logger.warning(f"Failed to synchronize with recovered node {node}")
-                    else:
-                        # Periodic sync check even for healthy nodes
-                        self.synchronize_node(node)
-                else:
-                    self.handle_node_failure(node)
-            except requests.exceptions.RequestException:
+                    return response.json()
+            except (requests.exceptions.RequestException, ValueError):
+                pass
+            return None
+
+        targets = self.peer_states.probe_targets(self.nodes)
+        results = self.fanout.run(targets, probe, accept=lambda health: health is not None).accepted
+        # Wynik każdej próby zapisał już PeerClient - tu tylko raportujemy
+        for node in targets:
+            if node not in results:
                 self.handle_node_failure(node)
 
+        lengths = {node: health.get('length', 0) for node, health in results.items()}
+        longest = max(lengths, key=lengths.get, default=None)
+        if longest is not None and lengths[longest] > len(self.chain):
+            logger.info("Node %s is ahead (%s blocks) - synchronizing", longest, lengths[longest])
+            self.synchronize_node(longest)
+
     def handle_node_failure(self, node):
-        """Handle node failure by marking it as failed and initiating recovery"""
-        logger.warning(f"Node {node} is down - marking as failed")
-        if node not in self.failed_nodes:
-            logger.error(f"Node {node} is down - marking as failed")
-            self.failed_nodes[node] = time.time()
-            self.synchronize_node(node)
-
-    def start_health_check(self):
-        logger.info("Starting periodic health check for nodes")
-        """Rozpoczyna okresowe sprawdzanie stanu węzłów"""
-        def health_check():
-            while True:
-                self.check_nodes_health()
-                time.sleep(self.health_check_interval)
-                
-        thread = threading.Thread(target=health_check, daemon=True)
-        thread.start()
+        """Report a failed probe; the failure itself was counted by the peer client"""
+        state = self.peer_states.state_of(node)
+        if state == OPEN:
+            logger.error("Node %s is down - skipping it until its next probe", node)
+        else:
+            logger.warning("Node %s did not answer the health check - it is %s", node, state)
+
+    def load_chain(self):
+        """
+        Load the chain persisted on disk, keeping its longest valid prefix - a damaged or
+        unlinked tail is cut off. A new (or entirely unreadable) store starts with a genesis block.
+        """
+        chain = []
+        for height in range(len(self.store)):
+            try:
+                chain.append(Block.from_dict(self.store.read(height)))
+            except Exception as e:
+                logger.error("Stored block %s is unreadable: %s", height, e)
+                break
+
+        valid = self.valid_prefix_length(chain)
+        if valid < len(self.store):
+            logger.error("Stored chain is invalid from block %s - keeping the valid prefix", valid)
+            self.store.truncate(valid)
+        if valid:
+            chain = chain[:valid]
+            logger.info("Loaded %s blocks from %s", len(chain), self.store.path)
+            for block in chain:
+                block.freeze()
+            self.chain = chain
+            self.mark_verified(len(chain) - 1)
+            return chain
+
+        genesis = self.create_genesis_block()
+        genesis.freeze()
+        self.store.append(genesis.json_bytes())
+        self.chain = [genesis]
+        self.mark_verified(0)
+        return self.chain
+
+    def extends_tip(self, block):
+        return block.index == len(self.chain) and block.previous_hash == self.chain[-1].hash
+
+    def append_block(self, block):
+        """
+        Add a block to the tip of the chain and persist it; returns False if it does not extend
+        the tip or is not valid on top of it. A block on a verified tip moves the watermark with it.
+        """
+        with self.lock:
+            if not self.extends_tip(block):
+                logger.warning("Block %s does not extend the chain tip - not appending it", block.index)
+                return False
+            if self.first_invalid_block([self.chain[-1], block], 1) is not None:
+                logger.warning("Block %s is not valid on top of the chain tip - not appending it", block.index)
+                return False
+            tip_verified = self.verified_height == len(self.chain) - 1
+            block.freeze()
+            self.chain.append(block)
+            self.store.append(block.json_bytes())
+            if tip_verified:
+                self.mark_verified(len(self.chain) - 1)
+            self.mempool.remove(block.merkle_tree.leaves)
+            return True
 
-    def verify_chain_integrity(self):
-            """Weryfikuje integralność blockchain i naprawia uszkodzenia"""
-            logger.info("Verifying chain integrity")
+    def persist_block(self, index):
+        """Write a block that was repaired in place back to the store"""
+        with self.lock:
+            block = self.chain[index]
+            block.invalidate()
+            self.store.put(index, block.json_bytes())
+            self.invalidate_digests(index)
+
+    def wire_body(self, encode, to_dict):
+        """Keyword arguments carrying a request body in the configured wire format"""
+        if self.binary_wire:
+            return {'data': encode(), 'headers': {'Content-Type': BINARY_CONTENT_TYPE}}
+        return {'json': to_dict()}
+
+    def trusted_prefix_height(self, chain):
+        """
+        Height up to which the given chain (Block objects or block dicts) is covered by our
+        verified watermark, i.e. it contains our verified tip at the same height. Returns -1 if it does not.
+        """
+        height = self.verified_height
+        if height < 0 or height >= len(self.chain) or self.chain[height].hash != self.verified_tip_hash:
+            return -1
+        if height >= len(chain):
+            return -1
+        block = chain[height]
+        block_hash = block['hash'] if isinstance(block, dict) else block.hash
+        return height if block_hash == self.verified_tip_hash else -1
+
+    def mark_verified(self, height):
+        """Move the watermark to the given height of our own chain"""
+        self.verified_height = height
+        self.verified_tip_hash = self.chain[height].hash if height >= 0 else None
+
+    def invalidate_watermark(self, index):
+        """Lower the watermark below a block that was modified or found corrupted"""
+        if index <= self.verified_height:
+            self.mark_verified(index - 1)
+        self.invalidate_digests(index)
+
+    def replace_chain(self, new_chain):
+        """
+        Adopt an already validated chain, keeping our own blocks for the verified prefix.
+        Block views are turned into Block objects only here.
+        """
+        with self.lock:
+            trusted = self.trusted_prefix_height(new_chain)
+            if trusted >= 0:
+                new_chain = self.chain[:trusted + 1] + new_chain[trusted + 1:]
+            new_chain = [block.materialize() if isinstance(block, BlockView) else block for block in new_chain]
+            for block in new_chain:
+                block.freeze()
+
+            # Only blocks past the first difference are rewritten on disk
+            common = 0
+            while (common < len(self.chain) and common < len(new_chain)
+                   and self.chain[common] is new_chain[common]):
+                common += 1
+            self.store.truncate(common)
+            for block in new_chain[common:]:
+                self.store.append(block.json_bytes())
+                self.mempool.remove(block.merkle_tree.leaves)
+
+            self.chain = new_chain
+            self.invalidate_digests(common)
+            self.mark_verified(len(new_chain) - 1)
+
+    def verify_chain_integrity(self, full=False):
+            """
+            Weryfikuje integralność blockchain i naprawia uszkodzenia.
+            Only blocks above the verified watermark are checked unless full is set.
+            """
+            start = 1 if full else max(1, self.trusted_prefix_height(self.chain) + 1)
+            logger.info("Verifying chain integrity from block %s", start)
             corrupted_blocks = []
             
-            for i in range(1, len(self.chain)):
+            for i in range(start, len(self.chain)):
                 block = self.chain[i]
                 prev_block = self.chain[i-1]
                 
@@ -400,150 +1125,160 @@ class BlockchainNode:
                         break
 
             if corrupted_blocks:
-                logger.error(f"Found corrupted blocks: {corrupted_blocks}")
+                logger.error("Found corrupted blocks: %s", corrupted_blocks)
+                self.invalidate_watermark(corrupted_blocks[0])
                 self.verify_and_correct_data()  # First try to repair corrupted data
                 self.repair_corrupted_blocks(corrupted_blocks)  # Then repair blocks if needed
+            else:
+                self.mark_verified(len(self.chain) - 1)
+            return not corrupted_blocks
 
     def repair_corrupted_blocks(self, corrupted_indices):
         """Naprawia uszkodzone bloki poprzez pobranie poprawnych kopii od innych węzłów"""
-        logger.info(f"Repairing corrupted blocks: {corrupted_indices}")
-        
-        for index in corrupted_indices:
-            consensus_data = None
-            consensus_count = 0
-            
-            for node in self.nodes:
-                try:
-                    response = requests.get(
-                        f'{node}/blockchain/block/{index}',
-                        timeout=5
-                    )
-                    
-                    if response.status_code == 200:
-                        block_data = response.json()
-                        
-                        # Reconstruct and verify block
-                        transactions = [Transaction.from_dict(t) for t in block_data['transactions']]
-                        if all(tx.verify_crc() for tx in transactions):  # Verify all transactions
-                            if not consensus_data:
-                                consensus_data = block_data
-                                consensus_count = 1
-                            elif block_data == consensus_data:
-                                consensus_count += 1
-                                
-                            if consensus_count > 5:
-                                # Reconstruct the block
-                                block = Block(
-                                    consensus_data['index'],
-                                    consensus_data['previous_hash'],
-                                    transactions,
-                                    consensus_data['timestamp']
-                                )
-                                block.hash = consensus_data['hash']
-                                block.nonce = consensus_data['nonce']
-                                
-                                if self.verify_block(block):
-                                    self.chain[index] = block
-                                    logger.info(f"Successfully repaired block {index}")
-                                    break
-                                
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Error getting block from node {node}: {e}")
-                    continue
+        logger.info("Repairing corrupted blocks: %s", corrupted_indices)
+        if not corrupted_indices:
+            return
+
+        # One range request per node covers all corrupted blocks
+        first, last = min(corrupted_indices), max(corrupted_indices)
+        candidates = {index: {} for index in corrupted_indices}
+        for node in self.live_nodes():
+            try:
+                for block_data in self.fetch_block_range(node, first, last + 1):
+                    by_hash = candidates.get(block_data['index'])
+                    if by_hash is not None:
+                        entry = by_hash.setdefault(block_data['hash'], [0, block_data])
+                        entry[0] += 1
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                logger.error("Error getting blocks from node %s: %s", node, e)
+
+        for index, by_hash in candidates.items():
+            for consensus_count, consensus_data in sorted(by_hash.values(), key=lambda entry: -entry[0]):
+                if consensus_count <= len(self.nodes) / 2:
+                    break
+
+                # Reconstruct and verify block
+                block = Block.from_dict(consensus_data)
+                if all(tx.verify_crc() for tx in block.transactions) and self.verify_block(block):
+                    block.freeze()
+                    with self.lock:
+                        if index >= len(self.chain):
+                            break
+                        self.chain[index] = block
+                        self.persist_block(index)
+                        self.invalidate_watermark(index)
+                    self.metrics.repairs.inc(1, 'block')
+                    logger.info("Successfully repaired block %s", index)
+                    break
 
     def verify_and_correct_data(self):
-        """Verify and correct data in transactions across nodes"""
+        """Verify transactions against their Merkle leaves and repair damaged ones from other nodes"""
         logger.info("Starting data verification across nodes")
         
         for block_index, block in enumerate(self.chain):
-            for tx_index, transaction in enumerate(block.transactions):
-                data_counts = {}
-                correct_data = None
-                
-                # Collect data from other nodes
-                for node in self.nodes:
-                    try:
-                        response = requests.get(
-                            f'{node}/blockchain/block/{block_index}',
-                            timeout=5
-                        )
-                        if response.status_code == 200:
-                            block_data = response.json()
-                            if len(block_data['transactions']) > tx_index:
-                                remote_tx = block_data['transactions'][tx_index]
-                                remote_data = remote_tx['data']
-                                
-                                # Handle base64 encoded image data
-                                if transaction.type == "image":
-                                    try:
-                                        # Ensure data is properly base64 encoded
-                                        if isinstance(remote_data, str):
-                                            remote_data = base64.b64decode(remote_data)
-                                    except:
-                                        logger.error(f"Invalid base64 data from node {node}")
-                                        continue
-                                
-                                data_key = remote_data if isinstance(remote_data, str) else base64.b64encode(remote_data).decode('utf-8')
-                                data_counts[data_key] = data_counts.get(data_key, 0) + 1
-                                
-                                if data_counts[data_key] > len(self.nodes) / 2:
-                                    correct_data = remote_data
-                                    break
-                                    
-                    except requests.exceptions.RequestException as e:
-                        logger.error(f"Error getting block from node {node}: {e}")
-                        continue
-                
-                # If we found consensus data and it's different from our current data
-                current_tx_dict = transaction.to_dict()
-                current_data = current_tx_dict['data']
-                
-                if correct_data and (
-                    (isinstance(correct_data, str) and current_data != correct_data) or
-                    (isinstance(correct_data, bytes) and base64.b64decode(current_data) != correct_data)
-                ):
-                    logger.warning(f"Data mismatch detected in block {block_index}, transaction {tx_index}")
-                    
-                    # Create consensus transaction
-                    consensus_tx = Transaction(
-                        correct_data,
-                        transaction.type
-                    )
-                    
-                    if consensus_tx.verify_crc():
-                        # Update the corrupted data
-                        transaction.data = correct_data
-                        transaction.crc = consensus_tx.crc
-                        logger.info(f"Corrected data for block {block_index}, transaction {tx_index}")
-                    else:
-                        logger.error(f"Consensus data CRC verification failed for block {block_index}, transaction {tx_index}")
+            for tx_index in range(len(block.transactions)):
+                if block.is_transaction_intact(tx_index):
+                    continue
+
+                logger.warning("Data mismatch detected in block %s, transaction %s", block_index, tx_index)
+                if not self.repair_transaction(block, tx_index):
+                    logger.error("Could not repair block %s, transaction %s", block_index, tx_index)
+
+    def repair_transaction(self, block, tx_index):
+        """
+        Fetch a single transaction with its inclusion proof and accept it if the proof
+        leads to our own Merkle root - one valid proof is enough, siblings are not downloaded
+        """
+        for node in self.live_nodes():
+            try:
+                response = self.http.get(
+                    f'{node}/blockchain/block/{block.index}/proof/{tx_index}',
+                    timeout=5
+                )
+                if response.status_code != 200:
+                    continue
+
+                proof_data = response.json()
+                candidate = Transaction.from_dict(proof_data['transaction'])
+                if not verify_merkle_proof(candidate.calculate_digest(), proof_data['proof'], block.merkle_root):
+                    logger.warning("Invalid inclusion proof from node %s for block %s, transaction %s", node, block.index, tx_index)
+                    continue
+                if not candidate.verify_crc():
+                    logger.warning("Transaction from node %s failed CRC verification", node)
+                    continue
+
+                # Update the corrupted data
+                with self.lock:
+                    with block.unfrozen():
+                        transaction = block.transactions[tx_index]
+                        transaction.data = candidate.data
+                        transaction.crc = candidate.crc
+                    self.persist_block(block.index)
+                    self.invalidate_watermark(block.index)
+                self.metrics.repairs.inc(1, 'transaction')
+                logger.info("Corrected data for block %s, transaction %s using proof from %s", block.index, tx_index, node)
+                return True
+
+            except requests.exceptions.RequestException as e:
+                logger.error("Error getting transaction proof from node %s: %s", node, e)
+            except (KeyError, ValueError) as e:
+                logger.error("Malformed transaction proof from node %s: %s", node, e)
+        return False
 
     def verify_transaction(self, transaction_data):
         """Verify a transaction received from another node"""
-        logger.info(
-            f"Verifying transaction - CRC: {transaction_data.get('crc')}",
-            extra={'node_id': self.node_id}
-        )
+        logger.info("Verifying transaction - CRC: %s", transaction_data.get('crc'))
         try:
             transaction = Transaction.from_dict(transaction_data)
             verification_result = transaction.verify_crc()
-            logger.info(
-                f"Transaction verification result - Valid: {verification_result}, "
-                f"CRC: {transaction.crc}",
-                extra={'node_id': self.node_id}
-            )
+            logger.info("Transaction verification result - Valid: %s, CRC: %s", verification_result, transaction.crc)
             if verification_result:
                 transaction.confirmations.add(f"http://{self.node_id}:5001")
                 self.add_transaction(transaction)
+                if transaction.blob_hash and not self.blobs.has(transaction.blob_hash):
+                    # Replicate the image in the background, the confirmation does not wait for it
+                    self.replicate_blob(transaction.blob_hash)
                 return True
             return False
         except Exception as e:
-            logger.error(
-                f"Transaction verification failed: {e}",
-                extra={'node_id': self.node_id}
-            )
+            logger.error("Transaction verification failed: %s", e)
             return False
 
+    def replicate_blob(self, blob_hash):
+        """Queue a fetch of a missing blob; a hash already queued or being fetched is not queued again"""
+        with self.replication_lock:
+            if blob_hash in self.replicating_blobs:
+                return
+            self.replicating_blobs.add(blob_hash)
+
+        def replicate():
+            try:
+                self.get_blob(blob_hash)
+            finally:
+                with self.replication_lock:
+                    self.replicating_blobs.discard(blob_hash)
+
+        self.blob_replication.submit(replicate)
+
+    def get_blob(self, blob_hash):
+        """Image blob by content hash - fetched from other nodes and cached locally if missing"""
+        data = self.blobs.get(blob_hash)
+        if data is not None:
+            return data
+
+        for node in self.live_nodes():
+            try:
+                response = self.http.get(f'{node}/blockchain/blob/{blob_hash}', params={'local': 1}, timeout=10)
+                if response.status_code == 200:
+                    self.blobs.put(response.content, expected_hash=blob_hash)
+                    logger.info("Fetched blob %s from node %s", blob_hash, node)
+                    return response.content
+            except requests.exceptions.RequestException as e:
+                logger.error("Error getting blob from node %s: %s", node, e)
+            except ValueError as e:
+                logger.error("Invalid blob from node %s: %s", node, e)
+        return None
+
     def generate_docker_node_addresses(self, num_nodes):
         """Generuje adresy węzłów używając nazw serwisów Docker"""
         node_addresses = []
@@ -555,120 +1290,171 @@ class BlockchainNode:
     def broadcast_transaction(self, transaction):
         """Broadcast transaction to other nodes and collect confirmations"""
         logger.info("Broadcasting transaction")
-        logger.info(f"Current node: {self.node_id}")
-        logger.info(f"Broadcasting to nodes: {self.nodes}")
+        logger.info("Current node: %s", self.node_id)
+        logger.info("Broadcasting to nodes: %s", self.nodes)
+        # Encode once for all peers
+        body = self.wire_body(lambda: wire.encode_transaction(transaction), transaction.to_dict)
 
         def confirm_with_node(node_address):
             try:
-                logger.info(f"Contacting node: {node_address}")
-                response = requests.post(
+                logger.info("Contacting node: %s", node_address)
+                response = self.http.post(
                     f"{node_address}/blockchain/verify_transaction",
-                    json=transaction.to_dict(),
-                    timeout=5
+                    timeout=5,
+                    **body
                 )
                 if response.status_code == 200:
-                    logger.info(f"Node {node_address} confirmed transaction")
+                    logger.info("Node %s confirmed transaction", node_address)
                     # Dodaj potwierdzenie do transakcji
-                    transaction.confirmations.add(node_address)
+                    self.mempool.confirm(transaction, node_address)
                     return node_address
                 else:
-                    logger.warning(f"Node {node_address} rejected transaction with status {response.status_code}")
+                    logger.warning("Node %s rejected transaction with status %s", node_address, response.status_code)
             except requests.exceptions.RequestException as e:
-                logger.error(f"Error contacting node {node_address}: {e}")
+                logger.error("Error contacting node %s: %s", node_address, e)
             return None
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(confirm_with_node, node) for node in self.nodes]
-            confirmations = set()
-            for future in as_completed(futures):
-                result = future.result()
-                if result:
-                    confirmations.add(result)
+        self.mempool.confirm(transaction, self.own_address())
 
-        node_num = int(self.node_id.replace('node', ''))
-        port = f"500{node_num}"
-        transaction.confirmations.add(f"http://{self.node_id}:{port}")
-        
         # required_confirmations = (len(self.nodes) + 1) // 2  # +1 aby uwzględnić bieżący węzeł
-        required_confirmations = 6
-        logger.info(f"Confirmations: {len(transaction.confirmations)} / {len(self.nodes) + 1} required: {required_confirmations}")
+        required_confirmations = self.transaction_confirmations
+        # Potwierdzenia, które przyjdą po osiągnięciu kworum, i tak zostaną dopisane do transakcji
+        self.gather_quorum('transaction', confirm_with_node, required_confirmations - 1)
+        logger.info("Confirmations: %s / %s required: %s", len(transaction.confirmations), len(self.nodes) + 1, required_confirmations)
         return len(transaction.confirmations) >= required_confirmations
 
 
+    def broadcast_transactions(self, transactions):
+        """
+        Confirm a batch of transactions with one request per peer; returns, for each
+        transaction, whether it collected the required confirmations
+        """
+        logger.info("Broadcasting batch of %s transactions", len(transactions))
+        body = self.wire_body(
+            lambda: wire.encode_transactions(transactions),
+            lambda: {'transactions': [transaction.to_dict() for transaction in transactions]}
+        )
+
+        def confirm_with_node(node_address):
+            try:
+                response = self.http.post(
+                    f"{node_address}/blockchain/verify_transactions", timeout=TRANSACTION_BATCH_TIMEOUT, **body
+                )
+                if response.status_code == 200:
+                    for transaction, verified in zip(transactions, response.json()['results']):
+                        if verified:
+                            self.mempool.confirm(transaction, node_address)
+                    return node_address
+                logger.warning("Node %s rejected transaction batch with status %s", node_address, response.status_code)
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                logger.error("Error contacting node %s: %s", node_address, e)
+            return None
+
+        own_address = self.own_address()
+        for transaction in transactions:
+            self.mempool.confirm(transaction, own_address)
+        self.gather_quorum(
+            'transaction_batch', confirm_with_node, self.transaction_confirmations - 1,
+            deadline=TRANSACTION_BATCH_TIMEOUT
+        )
+        return [len(transaction.confirmations) >= self.transaction_confirmations for transaction in transactions]
+
+    def own_address(self):
+        node_num = int(self.node_id.replace('node', ''))
+        return f"http://{self.node_id}:500{node_num}"
+
     def broadcast_mined_block(self, block):
         """Broadcast mined block to other nodes for verification and consensus"""
-        logger.info(f"Broadcasting mined block {block.index} to network")
+        logger.info("Broadcasting mined block %s to network", block.index)
         
-        confirmations = set()
-        block_data = {
-            'index': block.index,
-            'previous_hash': block.previous_hash,
-            'timestamp': block.timestamp,
-            'transactions': [t.to_dict() for t in block.transactions],
-            'hash': block.hash,
-            'nonce': block.nonce
-        }
+        body = self.wire_body(block.wire_bytes, block.to_dict)
 
         def get_node_confirmation(node):
             try:
-                response = requests.post(
+                response = self.http.post(
                     f'{node}/blockchain/verify_mined_block',
-                    json=block_data,
-                    timeout=5
+                    timeout=5,
+                    **body
                 )
                 if response.status_code == 200:
-                    logger.info(f"Node {node} confirmed mined block")
+                    logger.info("Node %s confirmed mined block", node)
                     return node
             except Exception as e:
-                logger.error(f"Error getting confirmation from {node}: {e}")
+                logger.error("Error getting confirmation from %s: %s", node, e)
             return None
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_node = {executor.submit(get_node_confirmation, node): node 
-                            for node in self.nodes}
-            for future in as_completed(future_to_node):
-                if future.result():
-                    confirmations.add(future.result())
-
         required_confirmations = (len(self.nodes) + 1) // 2
+        confirmations = self.gather_quorum('block', get_node_confirmation, required_confirmations)
         return len(confirmations) >= required_confirmations
 
-    def is_chain_valid(self, chain):
-        """Verify if a given chain is valid"""
-        logger.info("Verifying chain")
-        for i in range(1, len(chain)):
+    def gather_quorum(self, operation, call, quorum, deadline=None):
+        """
+        Fan call(peer) out to the live peers and record how long reaching the quorum took.
+        The deadline (seconds) defaults to the FanOut one and should cover the per-peer timeout of call.
+        """
+        result = self.fanout.run(self.live_nodes(), call, quorum=quorum, deadline=deadline)
+        self.metrics.quorum_latency.observe(result.elapsed, operation, 'reached' if len(result) >= quorum else 'missed')
+        return result
+
+    def is_chain_valid(self, chain, full=False):
+        """
+        Verify if a given chain is valid. Blocks covered by the verified watermark
+        are skipped unless full is set.
+        """
+        start = 1 if full else max(1, self.trusted_prefix_height(chain) + 1)
+        valid = self.first_invalid_block(chain, start) is None
+        self.metrics.verifications.inc(1, 'valid' if valid else 'invalid')
+        return valid
+
+    def valid_prefix_length(self, chain):
+        """Number of leading blocks that form a valid chain, checked in full from the genesis block"""
+        if not chain or chain[0].index != 0:
+            return 0
+        invalid = self.first_invalid_block(chain, 1)
+        self.metrics.verifications.inc(1, 'valid' if invalid is None else 'invalid')
+        return len(chain) if invalid is None else invalid
+
+    def first_invalid_block(self, chain, start):
+        """Position of the first block from `start` on that is not valid on top of its predecessor, None if all are"""
+        logger.info("Verifying chain from block %s", start)
+        for i in range(start, len(chain)):
             current_block = chain[i]
             previous_block = chain[i-1]
 
             # Verify current block hash
             if current_block.hash != current_block.calculate_hash():
-                logger.error(f"Block {current_block.index} hash mismatch")
-                logger.error(f"Calculated: {current_block.calculate_hash()}")
-                logger.error(f"Stored: {current_block.hash}")
-                return False
+                logger.error("Block %s hash mismatch", current_block.index)
+                logger.error("Calculated: %s", current_block.calculate_hash())
+                logger.error("Stored: %s", current_block.hash)
+                return i
 
             # Verify chain continuity
-            if current_block.previous_hash != previous_block.hash:
-                logger.error(f"Block {current_block.index} previous hash mismatch")
-                logger.error(f"Expected: {previous_block.hash}")
-                logger.error(f"Received: {current_block.previous_hash}")
-                return False
+            if current_block.previous_hash != previous_block.hash or current_block.index != previous_block.index + 1:
+                logger.error("Block %s previous hash mismatch", current_block.index)
+                logger.error("Expected: %s", previous_block.hash)
+                logger.error("Received: %s", current_block.previous_hash)
+                return i
 
             # Verify block mining difficulty
             if current_block.hash[:self.difficulty] != "0" * self.difficulty:
-                logger.error(f"Block {current_block.index} does not meet difficulty requirement 1")   
-                logger.error(f"Block hash: {current_block.hash}")
-                logger.error(f"Difficulty: {self.difficulty}")
-                return False
+                logger.error("Block %s does not meet difficulty requirement 1", current_block.index)   
+                logger.error("Block hash: %s", current_block.hash)
+                logger.error("Difficulty: %s", self.difficulty)
+                return i
 
             # Verify all transactions in the block
             for transaction in current_block.transactions:
                 if not transaction.verify_crc():
-                    logger.error(f"Transaction CRC verification failed - Block: {current_block.index}")
-                    logger.error(f"Transaction CRC: {transaction.crc}")
-                    return False
+                    logger.error("Transaction CRC verification failed - Block: %s", current_block.index)
+                    logger.error("Transaction CRC: %s", transaction.crc)
+                    return i
+
+            # Powtórzona transakcja daje ten sam korzeń co lista bez niej (CVE-2012-2459)
+            if has_duplicate_leaves(current_block.merkle_leaves()):
+                logger.error("Block %s contains duplicate transactions", current_block.index)
+                return i
 
-        return True
+        return None
 
     def resolve_conflicts(self):
         """
@@ -678,54 +1464,50 @@ class BlockchainNode:
         new_chain = None
         current_length = len(self.chain)
         
-        logger.info(f"Starting chain resolution. Current length: {current_length}")
+        logger.info("Starting chain resolution. Current length: %s", current_length)
 
         # Get and verify chains from all nodes
-        for node in self.nodes:
+        for node in self.live_nodes():
             try:
-                logger.info(f"Contacting node: {node}")
-                logger.info(f'{node}/blockchain/chain')
-                response = requests.get(f'{node}/blockchain/chain', timeout=5)
-                logger.info(f"Response status: {response.status_code}")
-                logger.info(f"Response data: {response.json()}")
-                if response.status_code == 200:
-                    chain_data = response.json()
-                    chain_length = chain_data['length']
-                    chain = []
-
-                    # Reconstruct the chain from JSON data
-                    for block_data in chain_data['chain']:
-                        transactions = [Transaction.from_dict(t) for t in block_data['transactions']]
-                        block = Block(
-                            block_data['index'],
-                            block_data['previous_hash'],
-                            transactions,
-                            block_data['timestamp']
-                        )
-                        block.hash = block_data['hash']
-                        chain.append(block)
-
-                    # Check if the chain is longer and valid
-                    if chain_length > current_length and self.is_chain_valid(chain):
-                        current_length = chain_length
-                        new_chain = chain
-                        logger.info(f"Found valid longer chain from {node}, length: {chain_length}")
+                logger.info("Contacting node: %s", node)
+                # Check if the chain is longer and valid
+                chain = self.fetch_longer_chain(node, current_length)
+                if chain:
+                    current_length = len(chain)
+                    new_chain = chain
+                    logger.info("Found valid longer chain from %s, length: %s", node, current_length)
 
             except requests.exceptions.RequestException as e:
-                logger.error(f"Error contacting node {node}: {e}")
+                logger.error("Error contacting node %s: %s", node, e)
                 continue
 
-        # Replace our chain if we found a valid longer one
-        if new_chain:
-            self.chain = new_chain
-            logger.info("Chain replaced successfully")
-            return True
+        # Replace our chain if we found a valid longer one (and it is still longer once we hold the lock)
+        with self.lock:
+            if new_chain and len(new_chain) > len(self.chain):
+                self.replace_chain(new_chain)
+                logger.info("Chain replaced successfully")
+                return True
 
         logger.info("Current chain is authoritative")
         return False
 
+    def announce_chain(self):
+        """Ask peers to resolve conflicts against our new chain, without waiting for them"""
+        def notify(node):
+            try:
+                logger.info("Notifying node %s about the new chain - resolve", node)
+                self.http.get(f'{node}/blockchain/nodes/resolve', timeout=5)
+                logger.info("Notified node %s about the new chain", node)
+            except requests.exceptions.RequestException as e:
+                logger.error("Error notifying node %s: %s", node, e)
+
+        self.fanout.notify(self.live_nodes(), notify)
+
     def create_genesis_block(self):
-        return Block(0, "0", [Transaction("Genesis Block")], time.time())
+        """The same genesis block on every node, so chains and digests agree from height 0"""
+        transaction = Transaction("Genesis Block")
+        transaction.timestamp = GENESIS_TIMESTAMP
+        return Block(0, "0", [transaction], GENESIS_TIMESTAMP)
 
     def get_latest_block(self):
         return self.chain[-1]
@@ -734,11 +1516,12 @@ class BlockchainNode:
         if not transaction.verify_crc():
             raise ValueError("Transaction CRC verification failed")
         
-        logger.info(f"Adding transaction to pending pool - CRC: {transaction.crc}")
-        
-        with self.lock:
-            self.pending_transactions.append(transaction)
-            logger.info(f"Transaction added to pending pool - pending_transactions: {len(self.pending_transactions)}")
+        logger.info("Adding transaction to pending pool - CRC: %s", transaction.crc)
+
+        if self.mempool.add(transaction):
+            logger.info("Transaction added to pending pool - pending transactions: %s", len(self.mempool))
+        else:
+            logger.info("Transaction %s already pending - merged confirmations", transaction.crc)
 
 
     def process_image(self, image_data):
@@ -746,10 +1529,11 @@ class BlockchainNode:
         logger.info("Starting image processing pipeline")
         
         try:
-            # 1. Create transaction and get initial CRC
-            transaction = Transaction(image_data, "image")
+            # 1. Store the image by content hash; the transaction only references it
+            blob_hash = self.blobs.put(image_data)
+            transaction = Transaction(Transaction.image_reference(blob_hash, len(image_data)), "image")
             initial_crc = transaction.calculate_crc()
-            logger.info(f"Initial CRC: {initial_crc}")
+            logger.info("Initial CRC: %s", initial_crc)
             
             # 2. Verify transaction
             if not transaction.verify_crc():
@@ -760,27 +1544,25 @@ class BlockchainNode:
             if not confirmation_result:
                 raise ValueError("Failed to get network consensus")
             
-            # 4. Add to pending transactions (if not already added by verify_transaction)
-            if transaction not in self.pending_transactions:
-                self.add_transaction(transaction)
-            
-            # 5. Mine block automatically if we have enough confirmations
-            mining_result = self.mine_pending_transactions()
+            # 4. Add to pending transactions (a copy added by verify_transaction is merged)
+            self.add_transaction(transaction)
             
+            # 5. Mine once the block policy says enough has accumulated
+            job = self.miner.trigger()
 
-            logger.info("5 w process",mining_result)
-            
             return {
                 "success": True,
                 "initial_crc": initial_crc,
                 "final_crc": transaction.crc,
+                "blob": blob_hash,
                 "confirmations": len(transaction.confirmations),
-                "mining_status": mining_result.get("status", "pending"),
-                "mining_message": mining_result.get("message", "Transaction added to pending pool")
+                "mining_job": job.id if job else None,
+                "mining_status": job.state if job else "pending",
+                "mining_message": "Mining job queued" if job else "Transaction added to pending pool"
             }
             
         except Exception as e:
-            logger.error(f"Image processing pipeline failed: {e}")
+            logger.error("Image processing pipeline failed: %s", e)
             return {
                 "success": False,
                 "error": str(e)
@@ -797,110 +1579,171 @@ class BlockchainNode:
                 return all(transaction.verify_crc() for transaction in block.transactions)
             
             # For all other blocks
+            # The hash must match the content - otherwise any prefix of zeros would do
+            if block.hash != block.calculate_hash():
+                logger.error("Block %s hash does not match its content", block.index)
+                return False
+
             # Verify block meets difficulty requirement
             if block.hash[:self.difficulty] != "0" * self.difficulty:
-                logger.info(f"self.difficulty: {self.difficulty}, block.hash: {block.hash}")
-                logger.error(f"Block {block.index} does not meet difficulty requirement 2")
+                logger.info("self.difficulty: %s, block.hash: %s", self.difficulty, block.hash)
+                logger.error("Block %s does not meet difficulty requirement 2", block.index)
                 return False
 
             # Verify transactions
             if not all(transaction.verify_crc() for transaction in block.transactions):
-                logger.error(f"Transaction verification failed in block {block.index}")
+                logger.error("Transaction verification failed in block %s", block.index)
+                return False
+
+            if has_duplicate_leaves(block.merkle_leaves()):
+                logger.error("Block %s contains duplicate transactions", block.index)
                 return False
 
             return True
 
+    def required_mining_confirmations(self):
+        return (len(self.nodes) + 1) // 2
+
     def mine_pending_transactions(self):
-        logger.info("Starting mining process xxc")
-        logger.info(self.pending_transactions)
+        logger.info("Starting mining process")
         with self.lock:
-            if not self.pending_transactions:
+            if not self.mempool:
                 return {
                     "success": False,
                     "message": "No pending transactions to mine",
                     "status": "idle"
                 }
 
-            try:
-                self.mining_status["is_mining"] = True
-                self.mining_status["progress"] = 0
-                
-                # Filtruj transakcje z wystarczającą liczbą potwierdzeń
-                required_confirmations = (len(self.nodes) + 1) // 2
-                valid_transactions = [
-                    tx for tx in self.pending_transactions 
-                    if len(tx.confirmations) >= required_confirmations
-                ]
-
-                logger.info(f"Valid transactions: {len(valid_transactions)}")
-
-
-                if not valid_transactions:
-                    return {
-                        "success": False,
-                        "message": "No transactions with sufficient confirmations",
-                        "status": "waiting_for_confirmations"
-                    }
-
-                block = Block(
-                    len(self.chain),
-                    self.get_latest_block().hash,
-                    valid_transactions
-                )
+            if self.mining_status["is_mining"]:
+                return {
+                    "success": False,
+                    "message": "Mining already in progress",
+                    "status": "mining"
+                }
 
-                
-                self.mining_status["progress"] = 50
-                block.mine_block(self.difficulty)
+            # Filtruj transakcje z wystarczającą liczbą potwierdzeń, w granicach polityki bloku
+            valid_transactions = self.mempool.ready(
+                self.required_mining_confirmations(),
+                limit=self.block_policy.max_transactions,
+                max_bytes=self.block_policy.max_bytes
+            )
 
-                
-                # Broadcast wykopanego bloku do sieci
-                if not self.broadcast_mined_block(block):
-                    logger.info("Failed to get network consensus for mined block")
-                    return {
-                        "success": False,
-                        "message": "Failed to get network consensus for mined block",
-                        "status": "consensus_failed"
-                    }
-
-                self.mining_status["progress"] = 75
-                self.chain.append(block)
+            logger.info("Valid transactions: %s", len(valid_transactions))
 
-                
-                # Usuń przetworzone transakcje
-                self.pending_transactions = [
-                    tx for tx in self.pending_transactions 
-                    if tx not in valid_transactions
-                ]
+            if not valid_transactions:
+                return {
+                    "success": False,
+                    "message": "No transactions with sufficient confirmations",
+                    "status": "waiting_for_confirmations"
+                }
 
-                logger.info(f"Pending transactions: {len(self.pending_transactions)}")  
-                
-                self.mining_status["progress"] = 100
-                
+            block = Block(
+                len(self.chain),
+                self.get_latest_block().hash,
+                valid_transactions
+            )
+            self.mining_status["is_mining"] = True
+            self.mining_status["progress"] = 0
+
+        # Nonce search and broadcast run without the lock, so new transactions
+        # can still be added while the block is being mined
+        try:
+            self.mining_status["progress"] = 50
+            mining_result = block.mine_block(self.difficulty, self.mining_engine)
+            self.mining_status["hash_rate"] = mining_result.hash_rate
+            self.metrics.hash_rate.set(mining_result.hash_rate)
+            self.metrics.hashes.inc(mining_result.attempts)
+            self.metrics.mining_duration.observe(mining_result.elapsed)
+
+            # Broadcast wykopanego bloku do sieci
+            if not self.broadcast_mined_block(block):
+                logger.info("Failed to get network consensus for mined block")
                 return {
-                    "success": True,
-                    "message": "Block mined and confirmed by network",
-                    "status": "completed",
-                    "block": {
-                        "index": block.index,
-                        "hash": block.hash,
-                        "transaction_count": len(block.transactions)
-                    }
+                    "success": False,
+                    "message": "Failed to get network consensus for mined block",
+                    "status": "consensus_failed"
                 }
-                
-            except Exception as e:
-                logger.exception(f"Error during mining: {e}")
+
+            self.mining_status["progress"] = 75
+            # Wykopane transakcje znikają z puli razem z dopisaniem bloku
+            if not self.append_block(block):
+                logger.warning("Chain tip changed while mining block %s - discarding it", block.index)
                 return {
                     "success": False,
-                    "message": f"Mining failed: {str(e)}",
-                    "status": "error"
+                    "message": "Chain changed while mining, block discarded",
+                    "status": "stale"
                 }
-            finally:
-                self.mining_status["is_mining"] = False
+            logger.info("Pending transactions: %s", len(self.mempool))
+            
+            self.mining_status["progress"] = 100
+            
+            return {
+                "success": True,
+                "message": "Block mined and confirmed by network",
+                "status": "completed",
+                "block": {
+                    "index": block.index,
+                    "hash": block.hash,
+                    "transaction_count": len(block.transactions),
+                    "nonce": block.nonce
+                },
+                "mining": mining_result.to_dict()
+            }
+            
+        except Exception as e:
+            logger.exception("Error during mining: %s", e)
+            return {
+                "success": False,
+                "message": f"Mining failed: {str(e)}",
+                "status": "error"
+            }
+        finally:
+            self.mining_status["is_mining"] = False
 
 def create_blockchain_app():
     app = Flask(__name__)
     node_id = os.getenv('NODE_ID', 'node1')
-    blockchain = BlockchainNode(node_id=node_id)
+    blockchain = BlockchainNode(
+        node_id=node_id,
+        num_nodes=int(os.getenv('NUM_NODES', 6)),
+        difficulty=int(os.getenv('DIFFICULTY', 2))
+    )
+    app.extensions['blockchain'] = blockchain
+
+    def request_payload(decode):
+        """Request body as dicts, whichever wire format the peer used"""
+        if request.mimetype == BINARY_CONTENT_TYPE:
+            return decode(request.get_data())
+        return request.get_json()
+
+    def wants_binary():
+        return request.accept_mimetypes.best_match([JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE]) == BINARY_CONTENT_TYPE
+
+    def json_document(key, entries, **fields):
+        """JSON object with already serialized entries under `key`, followed by the other fields"""
+        body = b'{"' + key.encode() + b'": [' + b', '.join(entries) + b']'
+        if fields:
+            body += b', ' + json.dumps(fields)[1:-1].encode()
+        return Response(body + b'}', mimetype=JSON_CONTENT_TYPE)
+
+    @app.before_request
+    def start_timer():
+        g.started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        blockchain.metrics.http_latency.observe(
+            time.perf_counter() - g.started, route, request.method, response.status_code
+        )
+        # Strumień ndjson z /chain liczy wysłane bajty sam
+        if request.endpoint in SYNC_ENDPOINTS and not response.is_streamed:
+            blockchain.metrics.sync_bytes.inc(response.calculate_content_length() or 0, 'sent')
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        return Response(blockchain.metrics.render(), content_type=TEXT_CONTENT_TYPE)
 
     @app.route('/simulate/failure', methods=['POST'])
     def simulate_failure():
@@ -917,25 +1760,38 @@ def create_blockchain_app():
                 block_idx = random.randint(1, len(blockchain.chain) - 1)
                 block = blockchain.chain[block_idx]
                 if block.transactions:
-                    block.transactions[0].data = "corrupted_data"
+                    with block.unfrozen():
+                        block.transactions[0].data = "corrupted_data"
                     return jsonify({'message': 'Data corruption simulated'}), 200
                     
         elif failure_type == 'hash_corruption':
             logger.warning("Simulating hash corruption")
             if len(blockchain.chain) > 1:
                 block_idx = random.randint(1, len(blockchain.chain) - 1)
-                blockchain.chain[block_idx].hash = "corrupted_hash"
+                with blockchain.chain[block_idx].unfrozen() as block:
+                    block.hash = "corrupted_hash"
                 return jsonify({'message': 'Hash corruption simulated'}), 200
 
         return jsonify({'message': 'Unknown failure type'}), 400
 
     @app.route('/health', methods=['GET'])
     def health_check():
-        return jsonify({'status': 'healthy', 'node_id': blockchain.node_id}), 200
+        return jsonify({'status': 'healthy', 'node_id': blockchain.node_id, 'length': len(blockchain.chain)}), 200
+
+    @app.route('/mempool', methods=['GET'])
+    def get_mempool():
+        stats = blockchain.mempool.stats()
+        stats['block_policy'] = blockchain.block_policy.to_dict()
+        return jsonify(stats), 200
+
+    @app.route('/peers', methods=['GET'])
+    def get_peers():
+        return jsonify(blockchain.peer_states.snapshot()), 200
 
     @app.route('/synchronize', methods=['POST'])
     def synchronize():
-        data = request.get_json()
+        blockchain.metrics.sync_bytes.inc(request.content_length or 0, 'received')
+        data = request_payload(wire.decode_sync)
         try:
             new_chain = []
             incoming_chain_length = len(data['chain'])
@@ -950,41 +1806,31 @@ def create_blockchain_app():
                     logger.info("Chains are identical - no synchronization needed")
                     return jsonify({'message': 'Chains already synchronized'}), 200
             
+            # Bloki poniżej znacznika weryfikacji bierzemy z własnego łańcucha
+            trusted = blockchain.trusted_prefix_height(data['chain'])
+            new_chain = blockchain.chain[:trusted + 1]
+
             # Rekonstrukcja łańcucha blok po bloku
-            for block_data in data['chain']:
+            for block_data in data['chain'][trusted + 1:]:
                 try:
-                    # Rekonstruuj transakcje
-                    transactions = []
-                    for tx_data in block_data['transactions']:
-                        transaction = Transaction.from_dict(tx_data)
+                    # Widok bloku - transakcje sprawdzane bez budowania obiektów
+                    block = BlockView(block_data)
+                    for transaction in block.transactions:
                         if not transaction.verify_crc():
-                            raise ValueError(f"Transaction CRC verification failed for transaction {tx_data['crc']}")
-                        transactions.append(transaction)
-                    
-                    # Stwórz nowy blok
-                    block = Block(
-                        block_data['index'],
-                        block_data['previous_hash'],
-                        transactions,
-                        block_data['timestamp']
-                    )
-                    
-                    # Ustaw nonce i przelicz hash
-                    block.nonce = block_data['nonce']
-                    calculated_hash = block.calculate_hash()
-                    
+                            raise ValueError(f"Transaction CRC verification failed for transaction {transaction.crc}")
+
                     # Porównaj otrzymany hash z przeliczonym
-                    if calculated_hash != block_data['hash']:
-                        logger.error(f"Hash mismatch for block {block.index}")
-                        logger.error(f"Calculated: {calculated_hash}")
-                        logger.error(f"Received: {block_data['hash']}")
+                    calculated_hash = block.calculate_hash()
+                    if calculated_hash != block.hash:
+                        logger.error("Hash mismatch for block %s", block.index)
+                        logger.error("Calculated: %s", calculated_hash)
+                        logger.error("Received: %s", block.hash)
                         return jsonify({'message': f'Hash mismatch for block {block.index}'}), 400
-                    
-                    block.hash = calculated_hash
+
                     new_chain.append(block)
                     
                 except Exception as e:
-                    logger.error(f"Error reconstructing block {block_data['index']}: {str(e)}")
+                    logger.error("Error reconstructing block %s: %s", block_data['index'], str(e))
                     return jsonify({'message': f'Block reconstruction failed: {str(e)}'}), 400
                 
             # Weryfikuj cały łańcuch
@@ -993,50 +1839,129 @@ def create_blockchain_app():
                 return jsonify({'message': 'Invalid chain received'}), 400
                 
             # Aktualizuj chain tylko jeśli jest dłuższy lub jesteśmy w trybie recovery
-            is_recovery_mode = len(blockchain.chain) <= 1
-            if len(new_chain) > len(blockchain.chain) or is_recovery_mode:
-                blockchain.chain = new_chain
-                logger.info(f"Chain synchronized successfully - length: {len(new_chain)}")
-                
-                # Aktualizuj pending transactions
-                chain_transactions = {tx.crc for block in new_chain for tx in block.transactions}
-                new_pending_transactions = [
-                    Transaction.from_dict(tx_data)
-                    for tx_data in data['pending_transactions']
-                    if tx_data['crc'] not in chain_transactions
-                ]
-                
-                blockchain.pending_transactions = new_pending_transactions
-                logger.info(f"Updated pending transactions pool - count: {len(blockchain.pending_transactions)}")
-                
-                return jsonify({'message': 'Synchronization successful'}), 200
-            else:
-                logger.info("Current chain is up to date")
-                return jsonify({'message': 'Current chain is up to date'}), 200
+            with blockchain.lock:
+                is_recovery_mode = len(blockchain.chain) <= 1
+                if len(new_chain) > len(blockchain.chain) or is_recovery_mode:
+                    blockchain.replace_chain(new_chain)
+                    logger.info("Chain synchronized successfully - length: %s", len(new_chain))
+
+                    # Aktualizuj pending transactions
+                    blockchain.mempool.replace(Transaction.from_dict(tx_data) for tx_data in data['pending_transactions'])
+                    blockchain.mempool.remove(leaf for block in blockchain.chain for leaf in block.merkle_tree.leaves)
+                    logger.info("Updated pending transactions pool - count: %s", len(blockchain.mempool))
+
+                    return jsonify({'message': 'Synchronization successful'}), 200
+
+            logger.info("Current chain is up to date")
+            return jsonify({'message': 'Current chain is up to date'}), 200
 
         except Exception as e:
-            logger.error(f"Error during synchronization: {e}")
+            logger.error("Error during synchronization: %s", e)
             return jsonify({'message': f'Synchronization failed: {str(e)}'}), 500
     
+    @app.route('/validate', methods=['GET'])
+    def validate_chain():
+        full = request.args.get('full', 'false').lower() in ('1', 'true', 'yes')
+        is_valid = blockchain.verify_chain_integrity(full=full)
+        return jsonify({
+            'valid': is_valid,
+            'full': full,
+            'verified_height': blockchain.verified_height,
+            'verified_tip_hash': blockchain.verified_tip_hash
+        }), 200
+
     @app.route('/block/<int:index>', methods=['GET'])
     def get_block(index):
         if 0 <= index < len(blockchain.chain):
             block = blockchain.chain[index]
-            block_data = {
-                'index': block.index,
-                'previous_hash': block.previous_hash,
-                'timestamp': block.timestamp,
-                'transactions': [t.to_dict() for t in block.transactions],
-                'hash': block.hash,
-                'nonce': block.nonce
-            }
-            return jsonify(block_data), 200
+            if wants_binary():
+                response = Response(block.wire_bytes(), mimetype=BINARY_CONTENT_TYPE)
+                response.set_etag(block.etag + '-wire')
+            else:
+                response = Response(block.json_bytes(), mimetype=JSON_CONTENT_TYPE)
+                response.set_etag(block.etag)
+            return response.make_conditional(request)
         return jsonify({'message': 'Block not found'}), 404
 
+    @app.route('/blocks', methods=['GET'])
+    def get_blocks():
+        """
+        Blocks [from, to) in one response, at most BLOCK_RANGE_LIMIT of them; `next` is where
+        the following page starts. fields=hash,crc,... returns only those values per block.
+        """
+        chain = blockchain.chain
+        start = max(request.args.get('from', 0, type=int), 0)
+        end = min(request.args.get('to', len(chain), type=int), len(chain), start + BLOCK_RANGE_LIMIT)
+        next_start = end if end < min(request.args.get('to', len(chain), type=int), len(chain)) else None
+        blocks = chain[start:end]
+
+        fields = [field for field in request.args.get('fields', '').split(',') if field]
+        unknown = [field for field in fields if field not in BLOCK_FIELDS]
+        if unknown:
+            return jsonify({'message': f'Unknown fields: {", ".join(unknown)}'}), 400
+
+        if not fields and wants_binary():
+            response = Response(wire.frame(block.wire_bytes() for block in blocks), mimetype=BINARY_CONTENT_TYPE)
+            if next_start is not None:
+                response.headers['X-Next-From'] = str(next_start)
+            return response
+
+        if not fields:
+            return json_document(
+                'blocks', [block.json_bytes() for block in blocks],
+                **{'from': start, 'to': end, 'next': next_start, 'length': len(chain)}
+            )
+        entries = [{'index': block.index, **{field: BLOCK_FIELDS[field](block) for field in fields}}
+                   for block in blocks]
+        return jsonify({
+            'blocks': entries,
+            'from': start,
+            'to': end,
+            'next': next_start,
+            'length': len(chain)
+        }), 200
+
+    @app.route('/block/<int:index>/proof/<int:tx_index>', methods=['GET'])
+    def get_transaction_proof(index, tx_index):
+        if not 0 <= index < len(blockchain.chain):
+            return jsonify({'message': 'Block not found'}), 404
+        block = blockchain.chain[index]
+        if not 0 <= tx_index < len(block.transactions):
+            return jsonify({'message': 'Transaction not found'}), 404
+        return jsonify({
+            'block_index': block.index,
+            'tx_index': tx_index,
+            'transaction': block.transactions[tx_index].to_dict(),
+            'proof': block.transaction_proof(tx_index),
+            'merkle_root': block.merkle_root,
+            'block_hash': block.hash
+        }), 200
+
+    @app.route('/blob/<blob_hash>', methods=['GET'])
+    def get_blob(blob_hash):
+        if not BlobStore.is_valid_hash(blob_hash):
+            return jsonify({'message': 'Invalid blob hash'}), 400
+        # Peers ask with local=1 so that a missing blob is not searched for recursively
+        if request.args.get('local'):
+            data = blockchain.blobs.get(blob_hash)
+        else:
+            data = blockchain.get_blob(blob_hash)
+        if data is None:
+            return jsonify({'message': 'Blob not found'}), 404
+
+        try:
+            mimetype = Image.MIME.get(Image.open(io.BytesIO(data)).format, 'application/octet-stream')
+        except Exception:
+            mimetype = 'application/octet-stream'
+        response = Response(data, mimetype=mimetype)
+        response.headers['ETag'] = blob_hash
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
     @app.route('/transaction/new', methods=['POST'])
     def new_transaction():
         values = request.get_json()
-        logger.info(f"Received new transaction request: {values}")
+        logger.info("Received new transaction request: %s", values)
 
         try:
             transaction = Transaction(values['data'], values.get('type', 'generic'))
@@ -1049,13 +1974,63 @@ def create_blockchain_app():
             logger.warning("Transaction rejected by the network")
             return jsonify({'message': 'Transaction rejected by network'}), 400
         except Exception as e:
-            logger.exception(f"Error in new_transaction: {e}")
+            logger.exception("Error in new_transaction: %s", e)
             return jsonify({'message': str(e)}), 400
         
 
+    @app.route('/transactions/batch', methods=['POST'])
+    def new_transactions_batch():
+        values = request.get_json(silent=True) or {}
+        items = values.get('transactions')
+        if not isinstance(items, list) or not items:
+            return jsonify({'message': 'Expected a non-empty list of transactions'}), 400
+        if len(items) > TRANSACTION_BATCH_LIMIT:
+            return jsonify({'message': f'At most {TRANSACTION_BATCH_LIMIT} transactions per batch'}), 413
+
+        try:
+            transactions = [Transaction(item['data'], item.get('type', 'generic')) for item in items]
+        except (KeyError, TypeError) as e:
+            return jsonify({'message': f'Invalid transaction: {e}'}), 400
+
+        # Jedna runda potwierdzeń dla całej paczki
+        confirmed = blockchain.broadcast_transactions(transactions)
+        for transaction, ok in zip(transactions, confirmed):
+            if ok:
+                blockchain.add_transaction(transaction)
+        job = blockchain.miner.trigger()
+
+        accepted = sum(confirmed)
+        logger.info("Transaction batch: %s of %s accepted by the network", accepted, len(transactions))
+        return jsonify({
+            'accepted': accepted,
+            'rejected': len(transactions) - accepted,
+            'transactions': [
+                {'crc': transaction.crc, 'confirmations': len(transaction.confirmations), 'accepted': ok}
+                for transaction, ok in zip(transactions, confirmed)
+            ],
+            'mining_job': job.id if job else None
+        }), 201 if accepted else 400
+
+    @app.route('/verify_transactions', methods=['POST'])
+    def verify_transactions():
+        try:
+            data = request_payload(wire.decode_transactions)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        items = data.get('transactions') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return jsonify({'message': 'Expected a list of transactions'}), 400
+        if len(items) > TRANSACTION_BATCH_LIMIT:
+            return jsonify({'message': f'At most {TRANSACTION_BATCH_LIMIT} transactions per batch'}), 413
+        logger.info("Transaction batch of %s received for verification", len(items))
+        return jsonify({'results': [blockchain.verify_transaction(tx) for tx in items]}), 200
+
     @app.route('/verify_mined_block', methods=['POST'])
     def verify_mined_block():
-        block_data = request.get_json()
+        try:
+            block_data = request_payload(wire.decode_block)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
 
         logger.info("Received mined block for verification")
         
@@ -1078,13 +2053,18 @@ def create_blockchain_app():
         if block.hash[:blockchain.difficulty] != "0" * blockchain.difficulty:
             return jsonify({'message': 'Block does not meet difficulty requirement'}), 400
         
-        blockchain.chain.append(block)
-            
+        # Blok, który nie przedłuża naszego łańcucha, nie trafia na dysk - węzeł dogoni sieć przez resolve
+        if not blockchain.append_block(block):
+            return jsonify({'message': 'Block does not extend the chain tip'}), 409
+
         return jsonify({'message': 'Block verified'}), 200
 
     @app.route('/verify_transaction', methods=['POST'])
     def verify_transaction():
-        transaction_data = request.get_json()
+        try:
+            transaction_data = request_payload(wire.decode_transaction)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
         logger.info("Transaction received for verification")
 
         if blockchain.verify_transaction(transaction_data):
@@ -1125,103 +2105,157 @@ def create_blockchain_app():
     def mine():
         logger.info("Starting mining process")
         # Sprawdź czy są jakieś transakcje oczekujące
-        if not blockchain.pending_transactions:
+        if not blockchain.mempool:
             return jsonify({
                 'success': False,
                 'message': 'No pending transactions to mine',
                 'status': 'idle'
             }), 200  # Zmiana kodu odpowiedzi na 200, bo to nie jest błąd
         
-        # Sprawdź czy mining już trwa
-        if blockchain.mining_status["is_mining"]:
-            return jsonify({
-                'success': False,
-                'message': 'Mining already in progress',
-                'progress': blockchain.mining_status["progress"],
-                'status': 'mining'
-            }), 409
+        job = blockchain.miner.submit('manual')
+        return jsonify({
+            'success': True,
+            'message': 'Mining job queued',
+            'job_id': job.id,
+            'status': job.state
+        }), 202
+
+    @app.route('/mine/jobs/<job_id>', methods=['GET'])
+    def mining_job(job_id):
+        job = blockchain.miner.get(job_id)
+        if job is None:
+            return jsonify({'message': 'Unknown mining job'}), 404
+        return jsonify(blockchain.miner.progress(job)), 200
+
+    @app.route('/mine/jobs/<job_id>/events', methods=['GET'])
+    def mining_job_events(job_id):
+        job = blockchain.miner.get(job_id)
+        if job is None:
+            return jsonify({'message': 'Unknown mining job'}), 404
+
+        def events():
+            # Server-sent events: nowy stan zadania tylko gdy coś się zmieniło
+            last = None
+            while True:
+                event = json.dumps(blockchain.miner.progress(job))
+                if event != last:
+                    yield f'data: {event}\n\n'
+                    last = event
+                if job.done:
+                    return
+                time.sleep(0.5)
 
-        result = blockchain.mine_pending_transactions()
+        return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
-        logger.info(result["success"])
-        
-        if result["success"]:
-            logger.info("Starting consensus resolution after mining")
-            was_chain_replaced = blockchain.resolve_conflicts()
+    def chain_entry(block, headers_only):
+        if headers_only:
+            return json.dumps(block.header_dict()).encode()
 
-            # Powiadom inne węzły tylko jeśli mining się powiódł
-            for node in blockchain.nodes:
-                try:
-                    logger.info(f"Notifying node {node} about the new chain - resolve")
-                    requests.get(f'{node}/blockchain/nodes/resolve', timeout=5)
-                    logger.info(f"Notified node {node} about the new chain")
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Error notifying node {node}: {e}")
-
-            result.update({
-                "chain_status": "replaced" if was_chain_replaced else "authoritative",
-                "status": "completed"
-            })
-            return jsonify(result), 200
-        else:
-            # Jeśli mining się nie powiódł, ale to nie był błąd (np. brak wystarczających potwierdzeń)
-            if "No transactions with sufficient confirmations" in result.get("message", ""):
-                return jsonify({
-                    'success': False,
-                    'message': result["message"],
-                    'status': 'waiting_for_confirmations'
-                }), 200
-            
-            # Rzeczywisty błąd
-            logger.error("Mining failed")
-            return jsonify({
-                'success': False,
-                'message': result["message"],
-                'status': 'error'
-            }), 400
+        def build(block):
+            entry = block.to_dict()
+            entry['confirmations'] = len(block.transactions[0].confirmations)
+            return json.dumps(entry).encode()
+
+        return block.cached('chain_entry', build)
 
     @app.route('/chain', methods=['GET'])
     def get_chain():
+        """
+        Blocks from `from` on. JSON responses are paginated (`limit` blocks, clamped to
+        CHAIN_PAGE_LIMIT; `next` is the cursor of the following page); format=ndjson streams
+        one block per line. A limit below 1 is rejected with 400.
+        headers=true leaves out the transactions.
+        """
         logger.info("Fetching the blockchain")
-        response = {
-            'chain': [
-                {
-                    'index': block.index,
-                    'previous_hash': block.previous_hash,
-                    'timestamp': block.timestamp,
-                    'transactions': [t.to_dict() for t in block.transactions],
-                    'hash': block.hash,
-                    'confirmations': len(block.transactions[0].confirmations)
-                }
-                for block in blockchain.chain
-            ],
-            'length': len(blockchain.chain)
-        }
-        return jsonify(response), 200
+        chain = blockchain.chain
+        start = max(request.args.get('from', 0, type=int), 0)
+        limit = request.args.get('limit')
+        if limit is not None:
+            # limit=0 albo ujemny dawałby pustą stronę z tym samym `next` - klient kręciłby się w kółko
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return jsonify({'message': 'limit must be a positive integer'}), 400
+        headers_only = request.args.get('headers', 'false').lower() in ('1', 'true', 'yes')
+        streaming = (request.args.get('format') == 'ndjson'
+                     or request.accept_mimetypes.best == 'application/x-ndjson')
+
+        if streaming:
+            end = len(chain) if limit is None else min(len(chain), start + limit)
+            blocks = chain[start:end]
+
+            def generate():
+                for block in blocks:
+                    line = chain_entry(block, headers_only) + b'\n'
+                    blockchain.metrics.sync_bytes.inc(len(line), 'sent')
+                    yield line
+
+            response = Response(generate(), mimetype='application/x-ndjson')
+            response.headers['X-Chain-Length'] = str(len(chain))
+            return response
+
+        end = min(len(chain), start + min(limit or CHAIN_PAGE_LIMIT, CHAIN_PAGE_LIMIT))
+        return json_document(
+            'chain', [chain_entry(block, headers_only) for block in chain[start:end]],
+            **{'length': len(chain), 'from': start, 'next': end if end < len(chain) else None}
+        )
+
+    @app.route('/chain/tip', methods=['GET'])
+    def get_chain_tip():
+        latest_block = blockchain.get_latest_block()
+        return jsonify({
+            'length': len(blockchain.chain),
+            'height': latest_block.index,
+            'tip_hash': latest_block.hash
+        }), 200
+
+    @app.route('/chain/locate', methods=['POST'])
+    def locate_fork_point():
+        values = request.get_json(silent=True)
+        locator = values.get('locator', []) if isinstance(values, dict) else None
+
+        def valid_entry(entry):
+            return isinstance(entry, dict) and type(entry.get('index')) is int and isinstance(entry.get('hash'), str)
+
+        if not isinstance(locator, list) or not all(valid_entry(entry) for entry in locator):
+            return jsonify({'message': 'Expected a locator: list of {"index": int, "hash": str}'}), 400
+        return jsonify({
+            'fork_point': blockchain.find_fork_point(locator),
+            'length': len(blockchain.chain),
+            'tip_hash': blockchain.get_latest_block().hash
+        }), 200
 
     @app.route('/nodes/resolve', methods=['GET'])
     def consensus():
         logger.info("Starting consensus resolution")
         replaced = blockchain.resolve_conflicts()
-        chain_data = [{
-            'index': block.index,
-            'previous_hash': block.previous_hash,
-            'transactions': [t.to_dict() for t in block.transactions],
-            'timestamp': block.timestamp,
-            'hash': block.hash
-        } for block in blockchain.chain]
 
         if replaced:
             logger.info("Chain was replaced with a longer valid chain")
         else:
             logger.info("Current chain is authoritative")
 
-        return jsonify({
-            'message': 'Chain was replaced' if replaced else 'Chain is authoritative',
-            'chain': chain_data,
-            'length': len(blockchain.chain)
-        }), 200
+        chain = blockchain.chain
+        return json_document(
+            'chain', [block.json_bytes() for block in chain],
+            message='Chain was replaced' if replaced else 'Chain is authoritative',
+            length=len(chain)
+        )
     
+    @app.route('/digest', methods=['GET'])
+    def get_chain_digest():
+        height = request.args.get('height', len(blockchain.chain) - 1, type=int)
+        digest = blockchain.chain_digest(height)
+        if digest is None:
+            return jsonify({'message': 'No block at this height'}), 404
+        return jsonify({'height': height, 'digest': digest, 'length': len(blockchain.chain)}), 200
+
+    @app.route('/integrity', methods=['GET'])
+    def integrity_status():
+        return jsonify(blockchain.integrity.status()), 200
+
     @app.route('/verify_hashes', methods=['POST'])
     def verify_hashes():
         """Endpoint to trigger hash verification"""
@@ -1232,7 +2266,7 @@ def create_blockchain_app():
                 'status': 'success'
             }), 200
         except Exception as e:
-            logger.error(f"Error during hash verification: {e}")
+            logger.error("Error during hash verification: %s", e)
             return jsonify({
                 'message': f'Hash verification failed: {str(e)}',
                 'status': 'error'
@@ -0,0 +1,96 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+
+class FanOutResult:
+    """Outcome of a fan-out: accepted results per peer, peers that failed and peers still in flight"""
+
+    def __init__(self, accepted, failed, pending, elapsed):
+        self.accepted = accepted
+        self.failed = failed
+        self.pending = pending
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.accepted)
+
+    def to_dict(self):
+        return {
+            'accepted': sorted(self.accepted),
+            'failed': sorted(self.failed),
+            'pending': sorted(self.pending),
+            'elapsed': self.elapsed
+        }
+
+
+class FanOut:
+    """
+    Shared worker pool for sending one request to many peers. A call returns as soon as
+    `quorum` peers have answered acceptably, the quorum can no longer be reached, or the
+    deadline passes - whichever comes first. Requests that have not started yet are
+    cancelled; requests already in flight finish in the background (bounded by their own
+    timeout) and their results are dropped.
+    """
+
+    def __init__(self, max_workers=32, deadline=5):
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fanout')
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_workers=int(os.getenv('FANOUT_WORKERS', 32)),
+            deadline=float(os.getenv('FANOUT_DEADLINE', 5))
+        )
+
+    def run(self, peers, call, quorum=None, deadline=None, accept=bool):
+        """
+        Run call(peer) for every peer in parallel. A result is accepted when accept(result)
+        is true; exceptions count as failures. Without a quorum it waits for all peers.
+        """
+        started = time.time()
+        deadline = started + (self.deadline if deadline is None else deadline)
+        futures = {self.executor.submit(call, peer): peer for peer in peers}
+        required = len(futures) if quorum is None else quorum
+        accepted, failed = {}, set()
+
+        outstanding = set(futures)
+        while outstanding and len(accepted) < required:
+            # Kworum nieosiągalne - nie ma sensu czekać na resztę
+            if len(accepted) + len(outstanding) < required:
+                break
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            done, outstanding = wait(outstanding, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                peer = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error("Request to %s failed: %s", peer, e)
+                    failed.add(peer)
+                    continue
+                if accept(result):
+                    accepted[peer] = result
+                else:
+                    failed.add(peer)
+
+        for future in outstanding:
+            future.cancel()
+        pending = {futures[future] for future in outstanding}
+        if pending:
+            logger.info("Fan-out finished with %s accepted, not waiting for %s", len(accepted), sorted(pending))
+        return FanOutResult(accepted, failed, pending, time.time() - started)
+
+    def notify(self, peers, call):
+        """Fire-and-forget call(peer) for every peer"""
+        for peer in peers:
+            self.executor.submit(call, peer)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,132 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class IntegrityScanner:
+    """
+    Single background subsystem for the node's health and integrity checks. Every cycle
+    probes the peers and compares rolling chain digests at the tip - one request per peer.
+    Only when they disagree are per-block digests (hash and transaction CRCs) gathered,
+    from the first divergent height on, and the hash correction, data repair and block
+    repair run for blocks whose digests disagree or fail local checks.
+    Transaction leaves are recomputed only for blocks from the divergence on, blocks above
+    the verified watermark and a window of `scan_window` blocks that rotates over the rest
+    of the chain, so in-memory damage of old blocks is still found within a few cycles.
+    The interval backs off while everything agrees and drops to the minimum after a fault.
+    """
+
+    def __init__(self, node, interval=30, min_interval=5, max_interval=300, backoff=1.5, scan_window=64):
+        self.node = node
+        self.base_interval = interval
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.scan_window = max(int(scan_window), 1)
+        self.scan_position = 0
+        self.thread = None
+        self.cycles = 0
+        self.last_cycle = None
+
+    @classmethod
+    def from_env(cls, node):
+        return cls(
+            node,
+            interval=float(os.getenv('INTEGRITY_INTERVAL', 30)),
+            min_interval=float(os.getenv('INTEGRITY_MIN_INTERVAL', 5)),
+            max_interval=float(os.getenv('INTEGRITY_MAX_INTERVAL', 300)),
+            scan_window=int(os.getenv('INTEGRITY_SCAN_WINDOW', 64))
+        )
+
+    def start(self):
+        logger.info("Starting integrity scanner")
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                fault = self.run_cycle()
+            except Exception as e:
+                logger.exception("Integrity cycle failed: %s", e)
+                fault = True
+            self.adapt_interval(fault)
+            time.sleep(self.interval)
+
+    def adapt_interval(self, fault):
+        if fault:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(max(self.interval, self.base_interval) * self.backoff, self.max_interval)
+
+    def run_cycle(self):
+        """One pass over the chain; returns True if anything was found wrong"""
+        started = time.time()
+        node = self.node
+        node.check_nodes_health()
+
+        chain = list(node.chain)
+        divergence = node.locate_divergence(len(chain) - 1)
+        peer_digests = node.collect_peer_digests(divergence) if divergence is not None else []
+        scanned = self.heights_to_scan(len(chain), divergence)
+        suspicious = {}
+        for index in scanned:
+            block = chain[index]
+            damaged = [i for i in range(len(block.transactions)) if not block.is_transaction_intact(i)]
+            consensus = node.consensus_digest(index, peer_digests)
+            local = (block.hash, tuple(t.crc for t in block.transactions))
+            if damaged or (consensus is not None and consensus != local):
+                suspicious[index] = (consensus, damaged)
+
+        if suspicious:
+            logger.warning("Integrity scan found suspicious blocks: %s", sorted(suspicious))
+            self.repair(chain, suspicious)
+
+        self.cycles += 1
+        self.last_cycle = {
+            'started': started,
+            'duration': time.time() - started,
+            'blocks': len(chain),
+            'divergence': divergence,
+            'scanned_blocks': len(scanned),
+            'suspicious_blocks': sorted(suspicious)
+        }
+        return bool(suspicious)
+
+    def heights_to_scan(self, length, divergence):
+        """Heights checked locally in this cycle, in order; moves the rotating window on"""
+        heights = set(range(max(self.node.verified_height + 1, 0), length))
+        if divergence is not None:
+            heights.update(range(divergence, length))
+        if self.scan_position >= length:
+            self.scan_position = 0
+        end = min(self.scan_position + self.scan_window, length)
+        heights.update(range(self.scan_position, end))
+        self.scan_position = end
+        return sorted(heights)
+
+    def repair(self, chain, suspicious):
+        node = self.node
+        for index, (consensus, damaged) in sorted(suspicious.items()):
+            block = chain[index]
+            if consensus is not None and block.hash != consensus[0]:
+                node.correct_block_hash(index, consensus[0])
+            for tx_index in damaged:
+                if not node.repair_transaction(block, tx_index):
+                    logger.error("Could not repair block %s, transaction %s", index, tx_index)
+
+        still_corrupted = [
+            index for index in sorted(suspicious)
+            if index < len(node.chain) and not node.is_block_consistent(index)
+        ]
+        if still_corrupted:
+            node.repair_corrupted_blocks(still_corrupted)
+
+    def status(self):
+        status = dict(self.last_cycle or {})
+        status.update({'cycles': self.cycles, 'interval': self.interval})
+        return status
@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Loggery zdarzeń wywoływanych dla każdej transakcji / bloku - przepuszczany co n-ty wpis
+SAMPLED_LOGGERS = ('blockchain_node.records',)
+
+_listener = None
+_lock = threading.Lock()
+
+
+def parse_levels(value):
+    """'blockchain_node=WARNING,mining=DEBUG' -> {'blockchain_node': 30, 'mining': 10}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, _, level = item.partition('=')
+        level = logging.getLevelName(level.strip().upper())
+        if isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+
+class NodeContextFilter(logging.Filter):
+    """Adds the node id to every record, so call sites do not have to pass it"""
+
+    def __init__(self, node_id):
+        super().__init__()
+        self.node_id = node_id
+
+    def filter(self, record):
+        if not hasattr(record, 'node_id'):
+            record.node_id = self.node_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through the first and then every n-th record of each message template"""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(int(every), 1)
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        with self.lock:
+            seen = self.counts.get(record.msg, 0)
+            self.counts[record.msg] = seen + 1
+        return seen % self.every == 0
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues records as they are. The stdlib prepare() formats the message on the calling
+    thread and drops exc_info - here the listener's formatter does all of it.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'node_id': getattr(record, 'node_id', None),
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def configure_logging():
+    """
+    Route all records through a queue to a single writer thread, so request and mining
+    threads never wait on formatting or stream I/O. Configured once per process from
+    LOG_LEVEL, LOG_LEVELS (per logger), LOG_SAMPLE_EVERY and LOG_FORMAT (text or json).
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        handler = logging.StreamHandler(sys.stderr)
+        if os.getenv('LOG_FORMAT', 'text') == 'json':
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(NodeContextFilter(os.getenv('NODE_ID', 'unknown')))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(queue_handler)
+        root.setLevel(logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper()))
+
+        for name, level in parse_levels(os.getenv('LOG_LEVELS')).items():
+            logging.getLogger(name).setLevel(level)
+        sampling = SamplingFilter(os.getenv('LOG_SAMPLE_EVERY', 100))
+        for name in SAMPLED_LOGGERS:
+            logging.getLogger(name).addFilter(sampling)
+
+        _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import logging
+import threading
+from itertools import count
+
+logger = logging.getLogger(__name__)
+
+
+def transaction_size(transaction):
+    """Approximate memory footprint of a transaction's payload"""
+    if isinstance(transaction.data, (bytes, str)):
+        return len(transaction.data)
+    return len(json.dumps(transaction.data))
+
+
+class MempoolEntry:
+    def __init__(self, transaction, sequence, size):
+        self.transaction = transaction
+        self.sequence = sequence
+        self.size = size
+        self.bucket = len(transaction.confirmations)
+        self.added = time.time()
+
+
+class Mempool:
+    """
+    Pool of pending transactions keyed by their content digest (the Merkle leaf), so
+    lookups and duplicate detection are O(1). Entries are also grouped into buckets by
+    confirmation count; the ready-to-mine view only visits buckets at or above the
+    required count. When the pool is over its size limits, the least confirmed and
+    oldest transactions are evicted first.
+    """
+
+    def __init__(self, max_transactions=10000, max_bytes=64 * 1024 * 1024):
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self.entries = {}
+        self.buckets = {}
+        self.total_bytes = 0
+        self.sequence = count()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_transactions=int(os.getenv('MEMPOOL_MAX_TRANSACTIONS', 10000)),
+            max_bytes=int(os.getenv('MEMPOOL_MAX_BYTES', 64 * 1024 * 1024))
+        )
+
+    @staticmethod
+    def key_of(transaction):
+        return transaction.calculate_digest()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, transaction):
+        return self.key_of(transaction) in self.entries
+
+    def __iter__(self):
+        """Pending transactions in arrival order"""
+        with self.lock:
+            entries = sorted(self.entries.values(), key=lambda entry: entry.sequence)
+        return iter([entry.transaction for entry in entries])
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry.transaction if entry is not None else None
+
+    def _rebucket(self, key, entry):
+        bucket = len(entry.transaction.confirmations)
+        if bucket == entry.bucket:
+            return
+        self._unbucket(key, entry)
+        entry.bucket = bucket
+        self.buckets.setdefault(bucket, set()).add(key)
+
+    def _unbucket(self, key, entry):
+        members = self.buckets.get(entry.bucket)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self.buckets[entry.bucket]
+
+    def add(self, transaction):
+        """
+        Add a transaction; a duplicate only contributes its confirmations to the stored copy.
+        Returns True if the transaction was new.
+        """
+        key = self.key_of(transaction)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.transaction is not transaction:
+                    entry.transaction.confirmations.update(transaction.confirmations)
+                self._rebucket(key, entry)
+                return False
+
+            entry = MempoolEntry(transaction, next(self.sequence), transaction_size(transaction))
+            self.entries[key] = entry
+            self.buckets.setdefault(entry.bucket, set()).add(key)
+            self.total_bytes += entry.size
+            self._evict()
+            return True
+
+    def confirm(self, transaction, node):
+        """Record a confirmation; works for transactions that are not pooled (yet) too"""
+        with self.lock:
+            transaction.confirmations.add(node)
+            key = self.key_of(transaction)
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.transaction is not transaction:
+                    entry.transaction.confirmations.add(node)
+                self._rebucket(key, entry)
+
+    def _remove_key(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self._unbucket(key, entry)
+        self.total_bytes -= entry.size
+        return entry.transaction
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_transactions or self.total_bytes > self.max_bytes):
+            lowest = min(self.buckets)
+            key = min(self.buckets[lowest], key=lambda k: self.entries[k].sequence)
+            self._remove_key(key)
+            logger.warning("Mempool full - evicted transaction with %s confirmations", lowest)
+
+    def _ready_entries(self, required_confirmations):
+        with self.lock:
+            return [
+                self.entries[key]
+                for bucket, keys in self.buckets.items() if bucket >= required_confirmations
+                for key in keys
+            ]
+
+    def ready(self, required_confirmations, limit=None, max_bytes=None):
+        """
+        Transactions with at least the required confirmations, oldest first, up to `limit`
+        transactions and `max_bytes` of payload (the oldest one is always included)
+        """
+        entries = sorted(self._ready_entries(required_confirmations), key=lambda entry: entry.sequence)
+        if limit is not None:
+            entries = entries[:limit]
+        if max_bytes is not None:
+            total = 0
+            for position, entry in enumerate(entries):
+                total += entry.size
+                if total > max_bytes and position > 0:
+                    entries = entries[:position]
+                    break
+        return [entry.transaction for entry in entries]
+
+    def ready_summary(self, required_confirmations):
+        """(count, payload bytes, time the oldest was added) of the ready-to-mine transactions"""
+        entries = self._ready_entries(required_confirmations)
+        oldest = min((entry.added for entry in entries), default=None)
+        return len(entries), sum(entry.size for entry in entries), oldest
+
+    def remove(self, keys):
+        """Drop transactions by key (e.g. the Merkle leaves of a committed block)"""
+        with self.lock:
+            return sum(1 for key in keys if self._remove_key(key) is not None)
+
+    def replace(self, transactions):
+        """Reset the pool to the given transactions"""
+        with self.lock:
+            self.entries.clear()
+            self.buckets.clear()
+            self.total_bytes = 0
+            for transaction in transactions:
+                self.add(transaction)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'transactions': len(self.entries),
+                'bytes': self.total_bytes,
+                'buckets': {bucket: len(keys) for bucket, keys in sorted(self.buckets.items())}
+            }
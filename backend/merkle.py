@@ -0,0 +1,79 @@
+import hashlib
+
+
+def hash_pair(left, right):
+    return hashlib.sha256(left + right).digest()
+
+
+def merkle_root(leaves):
+    """
+    Compute the Merkle root of a list of 32-byte leaf digests.
+    An odd node at any level is paired with itself; an empty list hashes to sha256(b'').
+    Because of that pairing [a, b, c] and [a, b, c, c] share a root - callers must reject
+    duplicate leaves (has_duplicate_leaves) before trusting a root.
+    """
+    if not leaves:
+        return hashlib.sha256(b'').digest()
+
+    level = list(leaves)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hash_pair(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def has_duplicate_leaves(leaves):
+    """True if a leaf repeats - the only way two different leaf lists can produce the same root"""
+    leaves = list(leaves)
+    return len(set(leaves)) != len(leaves)
+
+
+class MerkleTree:
+    """Merkle tree kept with a block so that inclusion proofs can be served for single transactions"""
+
+    def __init__(self, leaves):
+        self.leaves = list(leaves)
+        self.levels = [self.leaves]
+        level = self.leaves
+        while len(level) > 1:
+            if len(level) % 2:
+                level = level + [level[-1]]
+            level = [hash_pair(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+            self.levels.append(level)
+
+    @property
+    def root(self):
+        if not self.leaves:
+            return hashlib.sha256(b'').digest()
+        return self.levels[-1][0]
+
+    def proof(self, index):
+        """Sibling hashes from the leaf up to the root, each with its side relative to the path"""
+        if not 0 <= index < len(self.leaves):
+            raise IndexError(f"Leaf index {index} out of range")
+
+        proof = []
+        for level in self.levels[:-1]:
+            sibling_index = index ^ 1
+            sibling = level[sibling_index] if sibling_index < len(level) else level[index]
+            proof.append({
+                'hash': sibling.hex(),
+                'position': 'left' if sibling_index < index else 'right'
+            })
+            index //= 2
+        return proof
+
+
+def verify_merkle_proof(leaf, proof, root):
+    """Check that a leaf digest belongs to the tree with the given root (bytes or hex)"""
+    if isinstance(root, str):
+        root = bytes.fromhex(root)
+    current = leaf
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        if step['position'] == 'left':
+            current = hash_pair(sibling, current)
+        else:
+            current = hash_pair(current, sibling)
+    return current == root
@@ -0,0 +1,179 @@
+import math
+import threading
+from bisect import bisect_left
+
+TEXT_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Domyślne przedziały histogramów (sekundy) - jak w klientach Prometheusa
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MINING_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def series_key(item):
+    return [str(value) for value in item[0]]
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    """
+    One metric family. Values are kept per tuple of label values in a plain dict
+    under a lock of the family; nothing is formatted until the registry is scraped.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items(), key=series_key)
+        return [f'{self.name}{format_labels(self.labels, key)} {format_value(value)}' for key, value in items]
+
+    def render(self):
+        return self.header() + self.samples()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, *labels):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Gauge set by the code, or read from `collect` at scrape time (no cost on the hot path)"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), collect=None):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def samples(self):
+        if self.collect is not None:
+            return [f'{self.name} {format_value(self.collect())}']
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        position = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                # Liczniki per przedział (ostatni to +Inf), suma, liczba obserwacji
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self.lock:
+            items = sorted(((key, (list(counts), total, count)) for key, (counts, total, count) in self.values.items()),
+                           key=series_key)
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.labels, key, [('le', format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=(), collect=None):
+        return self.register(Gauge(name, documentation, labels, collect))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class NodeMetrics:
+    """Metrics of one blockchain node, exposed on /blockchain/metrics"""
+
+    def __init__(self, node):
+        self.registry = registry = Registry()
+        self.hash_rate = registry.gauge('blockchain_hash_rate', 'Hash rate of the last nonce search (H/s)')
+        self.hashes = registry.counter('blockchain_hashes_total', 'Hashes computed while mining')
+        self.mining_duration = registry.histogram(
+            'blockchain_mining_duration_seconds', 'Duration of nonce searches', buckets=MINING_BUCKETS
+        )
+        self.mining_jobs = registry.counter('blockchain_mining_jobs_total', 'Finished mining jobs by status', ('status',))
+        self.peer_latency = registry.histogram(
+            'blockchain_peer_request_seconds', 'Latency of requests to peers', ('peer', 'outcome')
+        )
+        self.quorum_latency = registry.histogram(
+            'blockchain_quorum_seconds', 'Time until a fan-out reached its quorum or gave up', ('operation', 'outcome')
+        )
+        self.sync_bytes = registry.counter(
+            'blockchain_sync_bytes_total', 'Chain data transferred for synchronization', ('direction',)
+        )
+        self.verifications = registry.counter(
+            'blockchain_chain_verifications_total', 'Chain verification passes by result', ('result',)
+        )
+        self.repairs = registry.counter('blockchain_repairs_total', 'Repaired blocks, hashes and transactions', ('kind',))
+        self.http_latency = registry.histogram(
+            'blockchain_http_request_seconds', 'Latency of HTTP handlers', ('route', 'method', 'status')
+        )
+        registry.gauge('blockchain_chain_height', 'Index of the last block', collect=lambda: len(node.chain) - 1)
+        registry.gauge('blockchain_mempool_transactions', 'Pending transactions', collect=lambda: len(node.mempool))
+        registry.gauge('blockchain_mempool_bytes', 'Payload bytes of pending transactions',
+                       collect=lambda: node.mempool.total_bytes)
+
+    def render(self):
+        return self.registry.render()
@@ -0,0 +1,198 @@
+import os
+import time
+import queue
+import hashlib
+import logging
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+# How many attempts a worker makes between checks of the shared stop flag
+STOP_CHECK_INTERVAL = 2048
+NONCE_SIZE = 8
+# Workers are never forked from the node - a fork would copy its threads' locks in whatever state they are
+DEFAULT_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+# How long stopped workers get to exit before they are terminated
+JOIN_TIMEOUT = 5.0
+
+
+def encode_nonce(nonce):
+    """Fixed-width big-endian nonce appended to the block header"""
+    return nonce.to_bytes(NONCE_SIZE, 'big')
+
+
+class MiningResult:
+    """Outcome of a nonce search"""
+
+    def __init__(self, nonce, block_hash, attempts, elapsed, workers=1):
+        self.nonce = nonce
+        self.hash = block_hash
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def hash_rate(self):
+        """Hashes per second achieved during the search"""
+        if self.elapsed <= 0:
+            return float(self.attempts)
+        return self.attempts / self.elapsed
+
+    def to_dict(self):
+        return {
+            "nonce": self.nonce,
+            "hash": self.hash,
+            "attempts": self.attempts,
+            "elapsed": self.elapsed,
+            "hash_rate": self.hash_rate,
+            "workers": self.workers
+        }
+
+
+def search_nonces(prefix, target, start=0, step=1, stop_event=None):
+    """
+    Search nonces start, start + step, start + 2 * step, ... until a hash with the
+    given hex prefix is found. The hash of every attempt is sha256(prefix + encode_nonce(nonce)),
+    so the constant header prefix is hashed only once and its state is copied per attempt.
+    Returns (nonce, hash, attempts); nonce and hash are None when stopped early.
+    """
+    base = hashlib.sha256(prefix)
+    nonce = start
+    attempts = 0
+    while True:
+        candidate = base.copy()
+        candidate.update(nonce.to_bytes(NONCE_SIZE, 'big'))
+        digest = candidate.hexdigest()
+        attempts += 1
+        if digest.startswith(target):
+            return nonce, digest, attempts
+        nonce += step
+        if stop_event is not None and attempts % STOP_CHECK_INTERVAL == 0 and stop_event.is_set():
+            return None, None, attempts
+
+
+def _search_worker(prefix, target, start, step, stop_event, results):
+    """Process entry point - reports its result (or its attempt count) on the queue"""
+    try:
+        results.put(search_nonces(prefix, target, start, step, stop_event))
+    except Exception:
+        results.put((None, None, 0))
+
+
+class MiningEngine:
+    """Base class for pluggable proof-of-work engines"""
+
+    name = "base"
+
+    def search(self, prefix, difficulty, start_nonce=0):
+        raise NotImplementedError
+
+
+class SingleProcessMiningEngine(MiningEngine):
+    """Searches the nonce space sequentially in the calling thread"""
+
+    name = "single"
+
+    def search(self, prefix, difficulty, start_nonce=0):
+        started = time.time()
+        nonce, digest, attempts = search_nonces(prefix, '0' * difficulty, start_nonce)
+        return MiningResult(nonce, digest, attempts, time.time() - started)
+
+
+class ProcessPoolMiningEngine(MiningEngine):
+    """
+    Partitions the nonce space across worker processes - worker i tries
+    start + i, start + i + n, ... - and stops all of them once one finds a valid hash.
+    Low difficulties are mined in-process, where starting workers would cost more than the search.
+    """
+
+    name = "process"
+
+    def __init__(self, workers=None, min_difficulty=4, timeout=600.0, start_method=DEFAULT_START_METHOD):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.min_difficulty = min_difficulty
+        self.timeout = timeout
+        self.context = multiprocessing.get_context(start_method)
+        self.fallback = SingleProcessMiningEngine()
+
+    def search(self, prefix, difficulty, start_nonce=0):
+        if self.workers == 1 or difficulty < self.min_difficulty:
+            return self.fallback.search(prefix, difficulty, start_nonce)
+
+        target = '0' * difficulty
+        stop_event = self.context.Event()
+        results = self.context.Queue()
+        processes = [
+            self.context.Process(
+                target=_search_worker,
+                args=(prefix, target, start_nonce + i, self.workers, stop_event, results),
+                daemon=True
+            )
+            for i in range(self.workers)
+        ]
+
+        started = time.time()
+        deadline = started + self.timeout
+        for process in processes:
+            process.start()
+
+        found = None
+        attempts = 0
+        reported = 0
+        try:
+            while reported < len(processes):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"Nonce search did not finish within {self.timeout}s")
+                try:
+                    nonce, digest, worker_attempts = results.get(timeout=min(remaining, 1.0))
+                except queue.Empty:
+                    # A worker killed from outside never reports - stop waiting once none is left
+                    if not any(process.is_alive() for process in processes):
+                        break
+                    continue
+                reported += 1
+                attempts += worker_attempts
+                if nonce is not None and found is None:
+                    found = (nonce, digest)
+                    stop_event.set()
+        finally:
+            stop_event.set()
+            for process in processes:
+                process.join(JOIN_TIMEOUT)
+                if process.is_alive():
+                    logger.warning("Mining worker %s did not stop, terminating it", process.pid)
+                    process.terminate()
+                    process.join(JOIN_TIMEOUT)
+            results.close()
+
+        elapsed = time.time() - started
+        if found is None:
+            raise RuntimeError("Mining workers exited without finding a valid nonce")
+        return MiningResult(found[0], found[1], attempts, elapsed, self.workers)
+
+
+MINING_ENGINES = {
+    SingleProcessMiningEngine.name: SingleProcessMiningEngine,
+    ProcessPoolMiningEngine.name: ProcessPoolMiningEngine,
+}
+
+
+def create_mining_engine():
+    """Create the mining engine configured through MINING_ENGINE / MINING_WORKERS"""
+    engine_name = os.getenv('MINING_ENGINE', ProcessPoolMiningEngine.name)
+    if engine_name not in MINING_ENGINES:
+        logger.warning("Unknown mining engine '%s', using '%s'", engine_name, ProcessPoolMiningEngine.name)
+        engine_name = ProcessPoolMiningEngine.name
+
+    if engine_name == ProcessPoolMiningEngine.name:
+        workers = int(os.getenv('MINING_WORKERS', 0)) or None
+        min_difficulty = int(os.getenv('MINING_PARALLEL_MIN_DIFFICULTY', 4))
+        timeout = float(os.getenv('MINING_TIMEOUT', 600))
+        start_method = os.getenv('MINING_START_METHOD', DEFAULT_START_METHOD)
+        engine = ProcessPoolMiningEngine(workers, min_difficulty, timeout, start_method)
+        logger.info("Using process pool mining engine with %s workers", engine.workers)
+        return engine
+
+    logger.info("Using %s mining engine", engine_name)
+    return MINING_ENGINES[engine_name]()
@@ -0,0 +1,183 @@
+import os
+import time
+import uuid
+import queue
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+
+
+class BlockPolicy:
+    """
+    Block assembly limits. A block takes at most `max_transactions` transactions and
+    `max_bytes` of payload; mining starts as soon as the ready transactions reach either
+    limit or the oldest of them has waited `max_wait` seconds.
+    """
+
+    def __init__(self, max_transactions=100, max_bytes=1024 * 1024, max_wait=10):
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self.max_wait = max_wait
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_transactions=int(os.getenv('BLOCK_MAX_TRANSACTIONS', 100)),
+            max_bytes=int(os.getenv('BLOCK_MAX_BYTES', 1024 * 1024)),
+            max_wait=float(os.getenv('BLOCK_MAX_WAIT', 10))
+        )
+
+    def trigger_reason(self, count, size, oldest, now=None):
+        """Which threshold the ready transactions crossed, None if mining can wait"""
+        if not count:
+            return None
+        if count >= self.max_transactions:
+            return 'count'
+        if size >= self.max_bytes:
+            return 'size'
+        if (now or time.time()) - oldest >= self.max_wait:
+            return 'age'
+        return None
+
+    def to_dict(self):
+        return {'max_transactions': self.max_transactions, 'max_bytes': self.max_bytes, 'max_wait': self.max_wait}
+
+
+class MiningJob:
+    def __init__(self, reason):
+        self.id = uuid.uuid4().hex
+        self.reason = reason
+        self.state = QUEUED
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+
+    @property
+    def done(self):
+        return self.state == FINISHED
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'reason': self.reason,
+            'state': self.state,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'result': self.result
+        }
+
+
+class MiningService:
+    """
+    Background miner. HTTP handlers only enqueue a job and return its id; one worker
+    thread mines the pending transactions, then resolves conflicts and notifies peers.
+    Since every job mines the ready pool, a request that arrives while a job is still
+    queued joins that job instead of adding another one. Between jobs the worker checks
+    the block policy and queues a job by itself once a threshold is crossed.
+    """
+
+    def __init__(self, node, history=100, poll_interval=1):
+        self.node = node
+        self.history = history
+        self.poll_interval = poll_interval
+        self.jobs = OrderedDict()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.waiting = None
+        self.running = None
+        # Po nieudanym automatycznym kopaniu kolejna próba dopiero po max_wait
+        self.retry_at = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def from_env(cls, node):
+        return cls(node, history=int(os.getenv('MINING_JOB_HISTORY', 100)))
+
+    def submit(self, reason='manual'):
+        with self.lock:
+            if self.waiting is not None:
+                return self.waiting
+            job = MiningJob(reason)
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.history:
+                self.jobs.popitem(last=False)
+            self.waiting = job
+        self.queue.put(job)
+        logger.info("Queued mining job %s (%s)", job.id, reason)
+        return job
+
+    def trigger(self):
+        """Queue a job if the ready transactions crossed a policy threshold; returns it or None"""
+        node = self.node
+        with self.lock:
+            if self.waiting is not None:
+                return self.waiting
+            if self.running is not None or time.time() < self.retry_at:
+                return None
+        count, size, oldest = node.mempool.ready_summary(node.required_mining_confirmations())
+        reason = node.block_policy.trigger_reason(count, size, oldest)
+        if reason is None:
+            return None
+        return self.submit(reason)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def run(self):
+        while True:
+            try:
+                job = self.queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                self.trigger()
+                continue
+            with self.lock:
+                if self.waiting is job:
+                    self.waiting = None
+                self.running = job
+            job.state = RUNNING
+            job.started = time.time()
+            self.node.mining_status["job"] = job.id
+            try:
+                job.result = self.mine()
+            except Exception as e:
+                logger.exception("Mining job %s failed: %s", job.id, e)
+                job.result = {"success": False, "message": f"Mining failed: {str(e)}", "status": "error"}
+            finally:
+                job.finished = time.time()
+                job.state = FINISHED
+                self.node.metrics.mining_jobs.inc(1, job.result.get("status"))
+                self.node.mining_status["job"] = None
+                with self.lock:
+                    self.running = None
+                    if not job.result.get("success"):
+                        self.retry_at = time.time() + self.node.block_policy.max_wait
+
+    def mine(self):
+        node = self.node
+        result = node.mine_pending_transactions()
+        if result["success"]:
+            logger.info("Starting consensus resolution after mining")
+            was_chain_replaced = node.resolve_conflicts()
+            node.announce_chain()
+            result["chain_status"] = "replaced" if was_chain_replaced else "authoritative"
+        return result
+
+    def progress(self, job):
+        """Job state together with the live mining status - one server-sent event"""
+        event = job.to_dict()
+        if job.state == RUNNING:
+            event['mining'] = {
+                'progress': self.node.mining_status["progress"],
+                'hash_rate': self.node.mining_status["hash_rate"]
+            }
+        return event
@@ -0,0 +1,107 @@
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def parse_peer_timeouts(value):
+    """'node2=3,node5=10' -> {'node2': 3.0, 'node5': 10.0}"""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        host, _, seconds = item.partition('=')
+        try:
+            timeouts[host.strip()] = float(seconds)
+        except ValueError:
+            logger.warning("Ignoring invalid peer timeout '%s'", item)
+    return timeouts
+
+
+class PeerClient:
+    """
+    HTTP client for all peer communication. Every peer gets its own requests.Session
+    with a keep-alive connection pool, so repeated calls reuse TCP connections
+    instead of opening a new one per request. Request outcomes (2xx as successes, transport
+    errors and 5xx as failures) are reported to `peer_states` - the only place peer failures
+    are counted - and request durations to the `latency` histogram when attached.
+    """
+
+    def __init__(self, pool_size=10, default_timeout=5, peer_timeouts=None):
+        self.pool_size = pool_size
+        self.default_timeout = default_timeout
+        self.peer_timeouts = peer_timeouts or {}
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.peer_states = None
+        self.latency = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            pool_size=int(os.getenv('PEER_POOL_SIZE', 10)),
+            default_timeout=float(os.getenv('PEER_TIMEOUT', 5)),
+            peer_timeouts=parse_peer_timeouts(os.getenv('PEER_TIMEOUTS'))
+        )
+
+    @staticmethod
+    def peer_of(url):
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    def session(self, peer):
+        with self.lock:
+            session = self.sessions.get(peer)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount(peer, adapter)
+                self.sessions[peer] = session
+            return session
+
+    def timeout_for(self, peer, requested=None):
+        """Configured timeout of the peer (by host or host:port), else the one requested by the caller"""
+        netloc = urlsplit(peer).netloc
+        host = netloc.split(':')[0]
+        for key in (netloc, host):
+            if key in self.peer_timeouts:
+                return self.peer_timeouts[key]
+        return requested if requested is not None else self.default_timeout
+
+    def request(self, method, url, **kwargs):
+        peer = self.peer_of(url)
+        kwargs['timeout'] = self.timeout_for(peer, kwargs.get('timeout'))
+        started = time.perf_counter()
+        try:
+            response = self.session(peer).request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            if self.latency is not None:
+                self.latency.observe(time.perf_counter() - started, peer, 'error')
+            if self.peer_states is not None:
+                self.peer_states.record_failure(peer)
+            raise
+        if self.latency is not None:
+            self.latency.observe(time.perf_counter() - started, peer, 'ok')
+        if self.peer_states is not None:
+            # Błąd serwera liczy się jak brak odpowiedzi, 4xx to odpowiedź zdrowego węzła
+            if response.status_code >= 500:
+                self.peer_states.record_failure(peer)
+            elif 200 <= response.status_code < 300:
+                self.peer_states.record_success(peer)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
@@ -0,0 +1,114 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = 'healthy'
+SUSPECT = 'suspect'
+OPEN = 'open'
+
+
+class PeerState:
+    def __init__(self):
+        self.state = HEALTHY
+        self.failures = 0
+        self.retry_at = 0
+        self.last_seen = None
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'retry_at': self.retry_at if self.state == OPEN else None,
+            'last_seen': self.last_seen
+        }
+
+
+class PeerStates:
+    """
+    Circuit breaker per peer. A failed request makes a peer suspect; after `open_after`
+    consecutive failures its circuit opens and broadcasts and verification skip it.
+    An open peer gets a trial request (or a probe) again only after an exponentially
+    growing backoff, and any successful request closes the circuit.
+    """
+
+    def __init__(self, peers, open_after=3, base_backoff=5, max_backoff=300):
+        self.open_after = open_after
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.peers = {peer: PeerState() for peer in peers}
+
+    @classmethod
+    def from_env(cls, peers):
+        return cls(
+            peers,
+            open_after=int(os.getenv('PEER_OPEN_AFTER', 3)),
+            base_backoff=float(os.getenv('PEER_BACKOFF', 5)),
+            max_backoff=float(os.getenv('PEER_MAX_BACKOFF', 300))
+        )
+
+    def state_of(self, peer):
+        with self.lock:
+            return self.peers.setdefault(peer, PeerState()).state
+
+    def record_success(self, peer):
+        """Mark the peer healthy; returns its previous state"""
+        with self.lock:
+            entry = self.peers.setdefault(peer, PeerState())
+            previous = entry.state
+            entry.state = HEALTHY
+            entry.failures = 0
+            entry.last_seen = time.time()
+        if previous != HEALTHY:
+            logger.info("Peer %s is healthy again (was %s)", peer, previous)
+        return previous
+
+    def record_failure(self, peer):
+        """Count a failed request; returns the new state"""
+        with self.lock:
+            entry = self.peers.setdefault(peer, PeerState())
+            entry.failures += 1
+            if entry.failures < self.open_after:
+                entry.state = SUSPECT
+                return entry.state
+            backoff = min(self.base_backoff * 2 ** (entry.failures - self.open_after), self.max_backoff)
+            entry.retry_at = time.time() + backoff
+            opened = entry.state != OPEN
+            entry.state = OPEN
+        if opened:
+            logger.warning("Circuit for peer %s is open - skipping it for %.0fs", peer, backoff)
+        return OPEN
+
+    def available(self, peers):
+        """
+        Peers that requests may be sent to: closed circuits, plus open ones whose backoff
+        expired (half-open). A half-open peer is let through for a trial and then held back
+        for another base backoff, until the outcome of the trial closes or reopens its circuit.
+        """
+        now = time.time()
+        available = []
+        with self.lock:
+            for peer in peers:
+                entry = self.peers.setdefault(peer, PeerState())
+                if entry.state == OPEN:
+                    if entry.retry_at > now:
+                        continue
+                    entry.retry_at = now + self.base_backoff
+                available.append(peer)
+        return available
+
+    def probe_targets(self, peers):
+        """Peers due for a health probe: all with a closed circuit plus open ones whose backoff expired"""
+        now = time.time()
+        with self.lock:
+            return [
+                peer for peer in peers
+                if self.peers.setdefault(peer, PeerState()).state != OPEN or self.peers[peer].retry_at <= now
+            ]
+
+    def snapshot(self):
+        with self.lock:
+            return {peer: entry.to_dict() for peer, entry in self.peers.items()}
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blockchain_node
+from benchmarks.network import LocalNetwork, LocalPeerClient
+
+
+@pytest.fixture
+def node_environment(tmp_path, monkeypatch):
+    """Nodes with their store in tmp_path and no reachable peers"""
+    monkeypatch.setenv('BLOCKCHAIN_DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('BLOCKCHAIN_FSYNC', 'false')
+    monkeypatch.setenv('MINING_ENGINE', 'single')
+    for name in ('INTEGRITY_INTERVAL', 'INTEGRITY_MIN_INTERVAL', 'INTEGRITY_MAX_INTERVAL', 'BLOCK_MAX_WAIT'):
+        monkeypatch.setenv(name, '86400')
+    monkeypatch.setattr(LocalPeerClient, 'network', LocalNetwork(0))
+    monkeypatch.setattr(blockchain_node, 'PeerClient', LocalPeerClient)
+    return tmp_path
@@ -0,0 +1,78 @@
+import os
+
+from block_store import BlockStore, INDEX_ENTRY, RECORD_HEADER
+
+SEGMENT_SIZE = 200
+
+
+def open_store(path):
+    return BlockStore(str(path), segment_size=SEGMENT_SIZE, fsync=False)
+
+
+def filled_store(path, count):
+    store = open_store(path)
+    for height in range(count):
+        store.append({'i': height, 'pad': 'x' * 50})
+    return store
+
+
+def contents(store):
+    return [store.read(height)['i'] for height in range(len(store))]
+
+
+def segment_files(path):
+    return sorted(name for name in os.listdir(path) if name.startswith('segment_'))
+
+
+def test_segments_roll_over_and_reopen(tmp_path):
+    store = filled_store(tmp_path, 10)
+    store.close()
+
+    assert len(segment_files(tmp_path)) > 1
+    store = open_store(tmp_path)
+    assert contents(store) == list(range(10))
+
+
+def test_torn_record_at_the_end_of_a_segment_is_dropped(tmp_path):
+    store = filled_store(tmp_path, 10)
+    segment_id, offset, _ = store.entries[-1]
+    store.close()
+    # Awaria w trakcie zapisu: z ostatniego rekordu został tylko nagłówek i kawałek danych
+    with open(store.segment_path(segment_id), 'r+b') as segment:
+        segment.truncate(offset + RECORD_HEADER.size + 5)
+
+    store = open_store(tmp_path)
+    assert contents(store) == list(range(9))
+    assert os.path.getsize(store.segment_path(segment_id)) == offset
+
+    store.append({'i': 'next'})
+    store.close()
+    assert contents(open_store(tmp_path)) == list(range(9)) + ['next']
+
+
+def test_truncated_index_entry_is_dropped(tmp_path):
+    store = filled_store(tmp_path, 10)
+    store.close()
+    with open(store.index_path, 'r+b') as index:
+        index.truncate(10 * INDEX_ENTRY.size - 5)
+
+    store = open_store(tmp_path)
+    assert contents(store) == list(range(9))
+    assert os.path.getsize(store.index_path) == 9 * INDEX_ENTRY.size
+
+    store.append({'i': 'next'})
+    store.close()
+    assert contents(open_store(tmp_path)) == list(range(9)) + ['next']
+
+
+def test_unindexed_record_after_a_crash_is_cut_off(tmp_path):
+    store = filled_store(tmp_path, 3)
+    store.close()
+    # Rekord zapisany, ale awaria przed dopisaniem wpisu indeksu
+    with open(store.segment_path(store.segment_id), 'ab') as segment:
+        segment.write(RECORD_HEADER.pack(100, 0) + b'garbage')
+
+    store = open_store(tmp_path)
+    store.append({'i': 'next'})
+    store.close()
+    assert contents(open_store(tmp_path)) == [0, 1, 2, 'next']
@@ -0,0 +1,29 @@
+from blockchain_node import BlockchainNode
+from test_node_restart import mine_next
+
+
+def test_cached_digest_is_served_without_walking_the_chain(node_environment):
+    node = BlockchainNode('node1')
+    for position in range(3):
+        mine_next(node, f'block {position}')
+    tip = node.chain_digest(3)
+
+    # Bloki bez hasha - każde przejście po łańcuchu skończyłoby się błędem
+    chain = node.chain
+    node.chain = [None] * len(chain)
+    assert node.chain_digest(3) == tip and node.chain_digest(1) is not None
+    node.chain = chain
+
+
+def test_block_changed_in_place_changes_the_digest_from_its_height(node_environment):
+    node = BlockchainNode('node1')
+    for position in range(3):
+        mine_next(node, f'block {position}')
+    before = [node.chain_digest(height) for height in range(4)]
+
+    with node.chain[2].unfrozen() as block:
+        block.hash = '00' + 'b' * 62
+
+    after = [node.chain_digest(height) for height in range(4)]
+    assert after[:2] == before[:2]
+    assert after[2] != before[2] and after[3] != before[3]
@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from blockchain_node import create_blockchain_app
+
+
+@pytest.fixture
+def client(node_environment):
+    return create_blockchain_app().test_client()
+
+
+@pytest.mark.parametrize('body', [
+    {'locator': [{'index': 'x', 'hash': 1}]},
+    {'locator': [{'index': 0}]},
+    {'locator': ['genesis']},
+    {'locator': {'index': 0}},
+    [],
+])
+def test_malformed_locator_is_rejected(client, body):
+    response = client.post('/chain/locate', data=json.dumps(body), content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_locator_finds_the_shared_genesis(client):
+    genesis = client.application.extensions['blockchain'].chain[0]
+
+    response = client.post('/chain/locate', json={'locator': [{'index': 0, 'hash': genesis.hash}]})
+
+    assert response.status_code == 200 and response.get_json()['fork_point'] == 0
@@ -0,0 +1,32 @@
+import pytest
+
+import blockchain_node
+from blockchain_node import create_blockchain_app
+from test_node_restart import mine_next
+
+
+@pytest.fixture
+def app(node_environment):
+    return create_blockchain_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.mark.parametrize('limit', ['0', '-5', 'abc'])
+def test_invalid_limit_is_rejected(client, limit):
+    assert client.get('/chain', query_string={'limit': limit}).status_code == 400
+    assert client.get('/chain', query_string={'limit': limit, 'format': 'ndjson'}).status_code == 400
+
+
+def test_limit_is_clamped_to_page_size(app, client, monkeypatch):
+    node = app.extensions['blockchain']
+    mine_next(node, 'first')
+    mine_next(node, 'second')
+    monkeypatch.setattr(blockchain_node, 'CHAIN_PAGE_LIMIT', 2)
+
+    page = client.get('/chain', query_string={'limit': 50}).get_json()
+
+    assert len(page['chain']) == 2 and page['next'] == 2
@@ -0,0 +1,8 @@
+from blockchain_node import BlockchainNode
+
+
+def test_nodes_share_genesis_and_digest(node_environment):
+    first, second = BlockchainNode('node1'), BlockchainNode('node2')
+
+    assert first.chain[0].hash == second.chain[0].hash
+    assert first.chain_digest(0) == second.chain_digest(0)
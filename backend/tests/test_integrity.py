@@ -0,0 +1,15 @@
+from blockchain_node import BlockchainNode
+from integrity import IntegrityScanner
+from test_node_restart import mine_next
+
+
+def test_verified_blocks_are_scanned_in_a_rotating_window(node_environment):
+    node = BlockchainNode('node1')
+    for position in range(5):
+        mine_next(node, f'block {position}')
+    scanner = IntegrityScanner(node, scan_window=2)
+
+    windows = [scanner.heights_to_scan(len(node.chain), None) for _ in range(4)]
+
+    assert windows == [[0, 1], [2, 3], [4, 5], [0, 1]]
+    assert scanner.heights_to_scan(len(node.chain), 3) == [2, 3, 4, 5]
@@ -0,0 +1,25 @@
+import json
+import queue
+import logging
+
+from log_config import DeferredQueueHandler, JsonFormatter
+
+
+def test_records_are_formatted_by_the_listener_with_exceptions():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger('tests.deferred')
+    logger.propagate = False
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception("Failed %s", 'job')
+    finally:
+        logger.handlers.clear()
+
+    record = log_queue.get_nowait()
+    assert record.msg == "Failed %s" and record.exc_info is not None
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'Failed job'
+    assert 'ValueError: boom' in entry['exception']
@@ -0,0 +1,15 @@
+from blockchain_node import Block, BlockchainNode, Transaction
+from merkle import merkle_root
+
+
+def test_block_with_duplicated_transaction_is_rejected(node_environment):
+    node = BlockchainNode('node1')
+    transactions = [Transaction(data) for data in ('a', 'b', 'c')]
+    leaves = [transaction.calculate_digest() for transaction in transactions]
+    assert merkle_root(leaves) == merkle_root(leaves + leaves[-1:])
+
+    block = Block(1, node.chain[-1].hash, transactions + transactions[-1:])
+    block.mine_block(node.difficulty)
+
+    assert not node.verify_block(block)
+    assert not node.is_chain_valid(node.chain + [block])
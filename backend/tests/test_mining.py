@@ -0,0 +1,18 @@
+import pytest
+
+from mining import ProcessPoolMiningEngine, search_nonces
+
+
+def test_process_engine_finds_the_same_hash_as_a_sequential_search():
+    engine = ProcessPoolMiningEngine(workers=2, min_difficulty=1, timeout=60)
+
+    result = engine.search(b'header', 3)
+
+    assert search_nonces(b'header', '000', result.nonce)[1] == result.hash
+
+
+def test_process_engine_gives_up_after_its_timeout():
+    engine = ProcessPoolMiningEngine(workers=2, min_difficulty=1, timeout=0.5)
+
+    with pytest.raises(TimeoutError):
+        engine.search(b'header', 16)
@@ -0,0 +1,68 @@
+from blockchain_node import Block, BlockchainNode, Transaction, create_blockchain_app
+
+
+def mine_next(node, data):
+    block = Block(len(node.chain), node.chain[-1].hash, [Transaction(data)])
+    block.mine_block(node.difficulty)
+    with node.lock:
+        node.append_block(block)
+    return block
+
+
+def test_restart_on_existing_store(node_environment):
+    node = BlockchainNode('node1')
+    mined = mine_next(node, 'first')
+
+    restarted = BlockchainNode('node1')
+
+    assert [block.hash for block in restarted.chain] == [node.chain[0].hash, mined.hash]
+    assert 'blockchain_chain_verifications_total{result="valid"} 1' in restarted.metrics.render()
+
+
+def test_restart_keeps_valid_prefix_of_damaged_store(node_environment):
+    node = BlockchainNode('node1')
+    first = mine_next(node, 'first')
+    mine_next(node, 'second')
+    damaged = node.chain[2].to_dict()
+    damaged['hash'] = '00' + 'f' * 62
+    node.store.put(2, damaged)
+
+    restarted = BlockchainNode('node1')
+
+    assert [block.hash for block in restarted.chain] == [node.chain[0].hash, first.hash]
+    assert len(restarted.store) == 2
+
+
+def test_block_not_extending_tip_is_not_appended(node_environment):
+    node = BlockchainNode('node1')
+    orphan = Block(2, node.chain[0].hash, [Transaction('orphan')])
+    orphan.mine_block(node.difficulty)
+
+    assert not node.append_block(orphan)
+    assert len(node.chain) == 1 and len(node.store) == 1
+
+
+def test_appended_blocks_move_the_verified_watermark(node_environment, monkeypatch):
+    node = BlockchainNode('node1')
+    for position in range(5):
+        mine_next(node, f'block {position}')
+
+    assert node.verified_height == len(node.chain) - 1
+    assert node.verified_tip_hash == node.chain[-1].hash
+
+    recomputed = []
+    monkeypatch.setattr(Block, 'calculate_hash', lambda block: recomputed.append(block) or block.hash)
+    assert node.is_chain_valid(node.chain)
+    assert recomputed == []
+
+
+def test_mined_block_with_forged_hash_is_rejected(node_environment):
+    client = create_blockchain_app().test_client()
+    node = client.application.extensions['blockchain']
+    block = Block(1, node.chain[-1].hash, [Transaction('forged')])
+    block.hash = '00' + 'a' * 62
+
+    response = client.post('/verify_mined_block', json=block.to_dict())
+
+    assert response.status_code == 400
+    assert len(node.chain) == 1 and len(node.store) == 1
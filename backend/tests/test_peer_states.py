@@ -0,0 +1,57 @@
+import time
+
+import peer_state
+from blockchain_node import BlockchainNode
+from peer_state import OPEN, SUSPECT, PeerStates
+
+
+class OkResponse:
+    status_code = 200
+
+
+class OkSession:
+    def request(self, method, url, **kwargs):
+        return OkResponse()
+
+
+def test_failed_health_probe_is_counted_once(node_environment):
+    node = BlockchainNode('node1')
+    # Pierwszy cykl skanera (też z próbą węzłów) rusza zaraz po starcie
+    while node.integrity.cycles == 0:
+        time.sleep(0.01)
+    peer = node.nodes[0]
+    node.peer_states.record_success(peer)
+
+    node.check_nodes_health()
+
+    assert node.peer_states.snapshot()[peer]['failures'] == 1
+
+
+def test_successful_request_resets_the_failure_count(node_environment):
+    node = BlockchainNode('node1')
+    peer = node.nodes[0]
+    states = node.peer_states
+    states.record_failure(peer)
+    states.record_failure(peer)
+
+    node.http.session = lambda peer: OkSession()
+    node.http.get(f'{peer}/blockchain/health')
+    states.record_failure(peer)
+
+    assert states.state_of(peer) == SUSPECT
+
+
+def test_open_peer_gets_one_trial_after_its_backoff(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(peer_state.time, 'time', lambda: clock[0])
+    states = PeerStates(['peer'], open_after=3, base_backoff=5)
+    for _ in range(3):
+        states.record_failure('peer')
+    assert states.state_of('peer') == OPEN and states.available(['peer']) == []
+
+    clock[0] += 5
+    assert states.available(['peer']) == ['peer']
+    assert states.available(['peer']) == []
+
+    states.record_success('peer')
+    assert states.available(['peer']) == ['peer']
@@ -0,0 +1,51 @@
+import json
+import time
+
+import blockchain_node
+from blockchain_node import BlockchainNode, Transaction, create_blockchain_app
+
+
+class SlowPeerResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class SlowPeerSession:
+    """Peer that confirms every transaction of a batch, but only after `delay` seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def request(self, method, url, **kwargs):
+        if not url.endswith('/blockchain/verify_transactions'):
+            return SlowPeerResponse(404, {})
+        time.sleep(self.delay)
+        transactions = kwargs['json']['transactions']
+        return SlowPeerResponse(200, {'results': [True] * len(transactions)})
+
+
+def test_slow_peers_count_towards_the_batch_quorum(node_environment, monkeypatch):
+    monkeypatch.setenv('WIRE_FORMAT', 'json')
+    node = BlockchainNode('node1')
+    while node.integrity.cycles == 0:
+        time.sleep(0.01)
+    # Skala czasu zmniejszona: domyślny termin fan-outu 0.2 s, termin paczki 2 s, węzły odpowiadają po 0.5 s
+    node.fanout.deadline = 0.2
+    monkeypatch.setattr(blockchain_node, 'TRANSACTION_BATCH_TIMEOUT', 2)
+    node.http.session = lambda peer: SlowPeerSession(0.5)
+    for peer in node.nodes:
+        node.peer_states.record_success(peer)
+
+    assert node.broadcast_transactions([Transaction('batch')]) == [True]
+
+
+def test_verify_transactions_rejects_a_body_without_transactions(node_environment):
+    client = create_blockchain_app().test_client()
+
+    for body in ({}, {'transactions': 'x'}, {'transactions': [1]}, []):
+        response = client.post('/verify_transactions', data=json.dumps(body), content_type='application/json')
+        assert response.status_code == 400
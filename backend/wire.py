@@ -0,0 +1,185 @@
+import json
+import struct
+
+# Binarny format wymiany bloków i transakcji między węzłami (JSON zostaje dla frontendu)
+BINARY_CONTENT_TYPE = 'application/x-blockchain'
+JSON_CONTENT_TYPE = 'application/json'
+
+DATA_BYTES = 0
+DATA_TEXT = 1
+DATA_JSON = 2
+
+TRANSACTION_HEADER = struct.Struct('>d4sBI')   # timestamp, crc, data kind, data length
+BLOCK_HEADER = struct.Struct('>QdQI')          # index, timestamp, nonce, transaction count
+U8 = struct.Struct('>B')
+U16 = struct.Struct('>H')
+U32 = struct.Struct('>I')
+
+
+def _pack_short(value, size=U8):
+    raw = value.encode()
+    return size.pack(len(raw)) + raw
+
+
+class _Reader:
+    def __init__(self, payload):
+        self.payload = memoryview(payload)
+        self.offset = 0
+
+    def unpack(self, layout):
+        values = layout.unpack_from(self.payload, self.offset)
+        self.offset += layout.size
+        return values
+
+    def take(self, length):
+        if self.offset + length > len(self.payload):
+            raise ValueError("Truncated message")
+        chunk = self.payload[self.offset:self.offset + length]
+        self.offset += length
+        return bytes(chunk)
+
+    def short(self, size=U8):
+        (length,) = self.unpack(size)
+        return self.take(length).decode()
+
+
+def encode_transaction(transaction):
+    """
+    Layout: type, timestamp, CRC as 4 raw bytes, data kind and length, data, confirmations.
+    Image payloads travel as raw bytes instead of base64.
+    """
+    if isinstance(transaction.data, bytes):
+        kind, data = DATA_BYTES, transaction.data
+    elif isinstance(transaction.data, str):
+        kind, data = DATA_TEXT, transaction.data.encode()
+    else:
+        kind, data = DATA_JSON, json.dumps(transaction.data).encode()
+
+    parts = [
+        _pack_short(transaction.type),
+        TRANSACTION_HEADER.pack(transaction.timestamp, bytes.fromhex(transaction.crc), kind, len(data)),
+        data,
+        U8.pack(len(transaction.confirmations))
+    ]
+    parts.extend(_pack_short(node, U16) for node in transaction.confirmations)
+    return b''.join(parts)
+
+
+def _read_transaction(reader):
+    transaction_type = reader.short()
+    timestamp, crc, kind, length = reader.unpack(TRANSACTION_HEADER)
+    data = reader.take(length)
+    if kind == DATA_TEXT:
+        data = data.decode()
+    elif kind == DATA_JSON:
+        data = json.loads(data)
+    elif kind != DATA_BYTES:
+        raise ValueError(f"Unknown data kind {kind}")
+    (count,) = reader.unpack(U8)
+    return {
+        'type': transaction_type,
+        'data': data,
+        'timestamp': timestamp,
+        'crc': crc.hex(),
+        'confirmations': [reader.short(U16) for _ in range(count)]
+    }
+
+
+def encode_block(block):
+    parts = [
+        BLOCK_HEADER.pack(block.index, block.timestamp, block.nonce, len(block.transactions)),
+        _pack_short(block.previous_hash),
+        _pack_short(block.hash)
+    ]
+    for transaction in block.transactions:
+        encoded = encode_transaction(transaction)
+        parts.append(U32.pack(len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def _read_block(reader):
+    index, timestamp, nonce, count = reader.unpack(BLOCK_HEADER)
+    previous_hash = reader.short()
+    block_hash = reader.short()
+    transactions = []
+    for _ in range(count):
+        (length,) = reader.unpack(U32)
+        transactions.append(_read_transaction(_Reader(reader.take(length))))
+    return {
+        'index': index,
+        'previous_hash': previous_hash,
+        'timestamp': timestamp,
+        'transactions': transactions,
+        'hash': block_hash,
+        'nonce': nonce
+    }
+
+
+def frame(encoded_items):
+    """Length-prefixed sequence of already encoded blocks or transactions"""
+    items = list(encoded_items)
+    parts = [U32.pack(len(items))]
+    for encoded in items:
+        parts.append(U32.pack(len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def encode_blocks(blocks):
+    """Length-prefixed sequence of blocks"""
+    return frame(encode_block(block) for block in blocks)
+
+
+def decode_transaction(payload):
+    """Transaction dict in the same shape as Transaction.to_dict, with raw image bytes"""
+    try:
+        return _read_transaction(_Reader(payload))
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed transaction: {e}")
+
+
+def decode_block(payload):
+    try:
+        return _read_block(_Reader(payload))
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed block: {e}")
+
+
+def _read_list(reader, read_item):
+    (count,) = reader.unpack(U32)
+    items = []
+    for _ in range(count):
+        (length,) = reader.unpack(U32)
+        items.append(read_item(_Reader(reader.take(length))))
+    return items
+
+
+def decode_blocks(payload):
+    try:
+        return _read_list(_Reader(payload), _read_block)
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed block list: {e}")
+
+
+def encode_transactions(transactions):
+    """Length-prefixed sequence of transactions (body of a batch verification)"""
+    return frame(encode_transaction(transaction) for transaction in transactions)
+
+
+def decode_transactions(payload):
+    try:
+        return {'transactions': _read_list(_Reader(payload), _read_transaction)}
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed transaction list: {e}")
+
+
+def decode_sync(payload):
+    """Body of /synchronize: encode_blocks(chain) followed by encode_transactions(pending)"""
+    try:
+        reader = _Reader(payload)
+        chain = _read_list(reader, _read_block)
+        pending_transactions = _read_list(reader, _read_transaction)
+        return {'chain': chain, 'pending_transactions': pending_transactions}
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed synchronization message: {e}")
@@ -32,3 +32,25 @@ export interface BlockchainResponse {
   chain?: any[];
   length?: number;
 }
+
+export interface MiningResult {
+  success: boolean;
+  message: string;
+  status: string;
+  block?: {
+    index: number;
+    hash: string;
+    transaction_count: number;
+    nonce: number;
+  };
+}
+
+export interface MineResponse extends MiningResult {
+  job_id?: string;
+}
+
+export interface MiningJob {
+  job_id: string;
+  state: 'queued' | 'running' | 'finished';
+  result: MiningResult | null;
+}
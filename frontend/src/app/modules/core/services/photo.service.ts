@@ -7,11 +7,22 @@ import {
   switchMap,
   catchError,
   of,
+  timer,
+  first,
+  map,
 } from 'rxjs';
 import { environment } from 'src/environments/environment.development';
-import { ImageResponse, BlockchainResponse } from '../models/models';
+import {
+  ImageResponse,
+  BlockchainResponse,
+  MineResponse,
+  MiningJob,
+  MiningResult,
+} from '../models/models';
 import { AuthService } from './auth.service';
 
+const MINING_JOB_POLL_INTERVAL = 1000;
+
 export interface Photo {
   id: string;
   url: string;
@@ -36,7 +47,7 @@ export class PhotoService {
     });
   }
 
-  uploadAndProcessPhoto(file: File): Observable<BlockchainResponse> {
+  uploadAndProcessPhoto(file: File): Observable<MiningResult> {
     const formData = new FormData();
     formData.append('image', file);
 
@@ -47,10 +58,17 @@ export class PhotoService {
       .pipe(
         switchMap(() => this.processPhotoInBlockchain(formData)),
         switchMap(() => this.mineBlock()),
-        switchMap(() => this.getBlockchain()),
+        // /mine only queues a job - the block exists once the job has finished
+        switchMap((response) =>
+          response.job_id ? this.waitForMiningJob(response.job_id) : of(response)
+        ),
         catchError((error) => {
           console.error('Error processing photo:', error);
-          return of({ success: false, message: 'Failed to process photo' });
+          return of({
+            success: false,
+            message: 'Failed to process photo',
+            status: 'error',
+          });
         })
       );
   }
@@ -64,8 +82,25 @@ export class PhotoService {
     );
   }
 
-  private mineBlock(): Observable<BlockchainResponse> {
-    return this.http.get<BlockchainResponse>(`${this.apiUrl}/blockchain/mine`);
+  private mineBlock(): Observable<MineResponse> {
+    return this.http.get<MineResponse>(`${this.apiUrl}/blockchain/mine`);
+  }
+
+  private waitForMiningJob(jobId: string): Observable<MiningResult> {
+    return timer(0, MINING_JOB_POLL_INTERVAL).pipe(
+      switchMap(() =>
+        this.http.get<MiningJob>(`${this.apiUrl}/blockchain/mine/jobs/${jobId}`)
+      ),
+      first((job) => job.state === 'finished'),
+      map(
+        (job) =>
+          job.result ?? {
+            success: false,
+            message: 'Mining job finished without a result',
+            status: 'error',
+          }
+      )
+    );
   }
 
   getBlockchain(): Observable<BlockchainResponse> {
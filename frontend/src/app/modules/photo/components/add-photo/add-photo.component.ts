@@ -1,5 +1,5 @@
 import { Component, OnDestroy } from '@angular/core';
-import { Subject, takeUntil } from 'rxjs';
+import { EMPTY, Subject, expand, reduce, takeUntil } from 'rxjs';
 import { PhotoService } from 'src/app/modules/core/services/photo.service';
 import { PhotoStateService } from 'src/app/modules/core/services/photo.state';
 import { HttpClient } from '@angular/common/http';
@@ -13,6 +13,7 @@ export class AddPhotoComponent implements OnDestroy {
   private destroy$ = new Subject<void>();
   state$ = this.photoState.getState();
   chain: any[] = [];
+  readonly nodeUrl = 'http://localhost:5001';
 
   nodes = [
     { id: 1, name: 'Node 1', active: true },
@@ -44,11 +45,15 @@ export class AddPhotoComponent implements OnDestroy {
     this.photoState.setUploading(true);
 
     this.photoService.uploadAndProcessPhoto(file).subscribe({
-      next: () => {
+      next: (result) => {
         this.photoState.setProgress(100);
-        this.photoState.setSuccess(
-          'Photo successfully uploaded and processed on blockchain'
-        );
+        if (result.success) {
+          this.photoState.setSuccess(
+            `Photo successfully uploaded and processed on blockchain: ${result.message}`
+          );
+        } else {
+          this.photoState.setError(result.message);
+        }
         this.fetchChain();
       },
       error: (error) => {
@@ -71,11 +76,20 @@ export class AddPhotoComponent implements OnDestroy {
   }
 
   fetchChain() {
-    this.http
-      .get<any>('http://localhost:5001/blockchain/chain')
-      .pipe(takeUntil(this.destroy$))
-      .subscribe((data) => {
-        this.chain = data.chain;
+    // /chain is paginated - follow `next` until the last page
+    const page = (from: number) =>
+      this.http.get<any>(`${this.nodeUrl}/blockchain/chain`, {
+        params: { from },
+      });
+
+    page(0)
+      .pipe(
+        expand((data) => (data.next != null ? page(data.next) : EMPTY)),
+        reduce((chain: any[], data) => chain.concat(data.chain), []),
+        takeUntil(this.destroy$)
+      )
+      .subscribe((chain) => {
+        this.chain = chain;
       });
   }
 